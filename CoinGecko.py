@@ -1,5 +1,42 @@
-import requests
-from typing import Dict, Any, Optional
+import http_client
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+from cache import ResponseCache, MISS, make_key
+from ratelimit import TokenBucket, SingleFlight
+
+# Shared by every CoinGeckoToken instance and thread (public API allows roughly 30 calls/min)
+CALLS_PER_MINUTE = float(os.getenv("COINGECKO_CALLS_PER_MINUTE", "25"))
+rate_limiter = TokenBucket(rate=CALLS_PER_MINUTE / 60, capacity=5)
+CACHE_TTLS = {
+    "coin": 60,
+    "tickers": 60,
+    "market_chart": 300,
+    "market_chart_range": 60
+}
+response_cache = ResponseCache(max_bytes=16 * 1024 * 1024)
+_single_flight = SingleFlight()
+_refresh_pool = ThreadPoolExecutor(max_workers=2)
+
+def _load(url: str, params: Optional[Dict], key: str, ttl: float) -> Tuple[int, Any]:
+    rate_limiter.acquire()
+    response = http_client.get(url, params=params)
+    if response.status_code != 200:
+        return response.status_code, None
+    data = response.json()
+    response_cache.set(key, data, ttl)
+    return 200, data
+
+def _fetch(url: str, params: Optional[Dict], endpoint: str) -> Tuple[int, Any]:
+    """Rate-limited, coalesced fetch that serves stale data while refreshing in the background"""
+    key = make_key(url, params)
+    ttl = CACHE_TTLS[endpoint]
+    data, fresh = response_cache.lookup(key)
+    if data is not MISS:
+        if not fresh and not _single_flight.in_flight(key):
+            _refresh_pool.submit(_single_flight.do, key, lambda: _load(url, params, key, ttl))
+        return 200, data
+    return _single_flight.do(key, lambda: _load(url, params, key, ttl))
 
 class CoinGeckoToken:
     BASE_URL = "https://api.coingecko.com/api/v3"
@@ -11,10 +48,9 @@ class CoinGeckoToken:
         """Get real token data from CoinGecko API"""
         try:
             url = f"{self.BASE_URL}/coins/{self.token_id}"
-            response = requests.get(url)
+            status, data = _fetch(url, None, "coin")
             
-            if response.status_code == 200:
-                data = response.json()
+            if status == 200:
                 return {
                     "id": data.get("id"),
                     "symbol": data.get("symbol"),
@@ -27,7 +63,7 @@ class CoinGeckoToken:
                     "description": data.get("description", {}).get("en", "")
                 }
             else:
-                return {"error": f"API error: {response.status_code}"}
+                return {"error": f"API error: {status}"}
         except Exception as e:
             return {"error": str(e)}
 
@@ -35,10 +71,9 @@ class CoinGeckoToken:
         """Get real ticker data from CoinGecko"""
         try:
             url = f"{self.BASE_URL}/coins/{self.token_id}/tickers"
-            response = requests.get(url)
+            status, data = _fetch(url, None, "tickers")
             
-            if response.status_code == 200:
-                data = response.json()
+            if status == 200:
                 tickers = []
                 
                 for ticker in data.get("tickers", [])[:10]:  # Limit to top 10
@@ -53,7 +88,7 @@ class CoinGeckoToken:
                 
                 return {"tickers": tickers}
             else:
-                return {"error": f"API error: {response.status_code}"}
+                return {"error": f"API error: {status}"}
         except Exception as e:
             return {"error": str(e)}
 
@@ -62,16 +97,33 @@ class CoinGeckoToken:
         try:
             url = f"{self.BASE_URL}/coins/{self.token_id}/market_chart"
             params = {"vs_currency": "usd", "days": days}
-            response = requests.get(url, params=params)
+            status, data = _fetch(url, params, "market_chart")
+            
+            if status == 200:
+                return {
+                    "prices": data.get("prices", []),
+                    "market_caps": data.get("market_caps", []),
+                    "total_volumes": data.get("total_volumes", [])
+                }
+            else:
+                return {"error": f"API error: {status}"}
+        except Exception as e:
+            return {"error": str(e)}
+
+    def get_price_history_range(self, start: int, end: int) -> Dict[str, Any]:
+        """Get price history between two unix timestamps (seconds)"""
+        try:
+            url = f"{self.BASE_URL}/coins/{self.token_id}/market_chart/range"
+            params = {"vs_currency": "usd", "from": int(start), "to": int(end)}
+            status, data = _fetch(url, params, "market_chart_range")
             
-            if response.status_code == 200:
-                data = response.json()
+            if status == 200:
                 return {
                     "prices": data.get("prices", []),
                     "market_caps": data.get("market_caps", []),
                     "total_volumes": data.get("total_volumes", [])
                 }
             else:
-                return {"error": f"API error: {response.status_code}"}
+                return {"error": f"API error: {status}"}
         except Exception as e:
             return {"error": str(e)}
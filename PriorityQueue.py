@@ -1,26 +1,178 @@
 import heapq
+import itertools
+import threading
 from datetime import datetime
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+
+class Task:
+    __slots__ = ("task_id", "priority", "seq", "timestamp", "description", "key")
+
+    def __init__(self, task_id: int, priority: int, seq: int, timestamp: datetime, description: str):
+        self.task_id = task_id
+        self.priority = priority
+        self.seq = seq
+        self.timestamp = timestamp
+        self.description = description
+        # Sequence number breaks priority ties in insertion order
+        self.key = (priority, seq)
 
 class TaskManager:
+    """Thread-safe min-priority task queue with O(log n) cancel and reprioritize"""
 
-    
     def __init__(self):
-        self.task_queue: List[Tuple[int, datetime, str]] = []  # (priority, timestamp, description)
+        self._heap: List[Task] = []
+        self._position: Dict[int, int] = {}  # task_id -> index in _heap
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def task_queue(self) -> List[Tuple[int, datetime, str]]:
+        """(priority, timestamp, description) tuples in heap order"""
+        with self._lock:
+            return [(t.priority, t.timestamp, t.description) for t in self._heap]
+
+    # Heap maintenance; callers hold the lock
+
+    def _place(self, task: Task, index: int):
+        self._heap[index] = task
+        self._position[task.task_id] = index
+
+    def _sift_up(self, index: int):
+        heap, position = self._heap, self._position
+        task = heap[index]
+        key = task.key
+        while index > 0:
+            parent = (index - 1) >> 1
+            above = heap[parent]
+            if above.key <= key:
+                break
+            heap[index] = above
+            position[above.task_id] = index
+            index = parent
+        self._place(task, index)
+
+    def _sift_down(self, index: int):
+        # Same trick as heapq: walk the smaller children down to a leaf, then
+        # bubble back up, which saves a comparison per level on average
+        heap, position = self._heap, self._position
+        size = len(heap)
+        start = index
+        task = heap[index]
+        key = task.key
+        child = 2 * index + 1
+        while child < size:
+            right = child + 1
+            if right < size and heap[right].key < heap[child].key:
+                child = right
+            below = heap[child]
+            heap[index] = below
+            position[below.task_id] = index
+            index = child
+            child = 2 * index + 1
+        while index > start:
+            parent = (index - 1) >> 1
+            above = heap[parent]
+            if above.key <= key:
+                break
+            heap[index] = above
+            position[above.task_id] = index
+            index = parent
+        self._place(task, index)
+
+    def _remove_at(self, index: int) -> Task:
+        heap = self._heap
+        task = heap[index]
+        last = heap.pop()
+        del self._position[task.task_id]
+        if index < len(heap):
+            self._place(last, index)
+            self._sift_down(index)
+            self._sift_up(self._position[last.task_id])
+        return task
+
+    # Public API
+
+    def push(self, description: str, priority: int) -> int:
+        """Add a task and return its id"""
+        with self._lock:
+            task = Task(next(self._ids), priority, next(self._seq), datetime.now(), description)
+            self._heap.append(task)
+            self._position[task.task_id] = len(self._heap) - 1
+            self._sift_up(len(self._heap) - 1)
+            self._not_empty.notify()
+            return task.task_id
 
     def add_task(self, description: str, priority: int) -> str:
-        now = datetime.now()
-        heapq.heappush(self.task_queue, (priority, now, description))
+        self.push(description, priority)
         return f"✅ Task added: '{description}' with priority {priority}"
 
+    def pop(self) -> Optional[Task]:
+        """Remove and return the most urgent task, or None if the queue is empty"""
+        with self._lock:
+            return self._remove_at(0) if self._heap else None
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Task]:
+        """Block until a task is available (or timeout expires) and remove it"""
+        with self._not_empty:
+            if not self._not_empty.wait_for(lambda: self._heap, timeout):
+                return None
+            return self._remove_at(0)
+
     def get_next_task(self) -> Optional[str]:
-        if not self.task_queue:
+        task = self.pop()
+        if task is None:
             return "📭 No tasks available."
-        priority, timestamp, description = heapq.heappop(self.task_queue)
-        return f"🔜 Next Task: '{description}' (Priority {priority})"
+        return f"🔜 Next Task: '{task.description}' (Priority {task.priority})"
+
+    def cancel(self, task_id: int) -> bool:
+        with self._lock:
+            index = self._position.get(task_id)
+            if index is None:
+                return False
+            self._remove_at(index)
+            return True
+
+    def reprioritize(self, task_id: int, priority: int) -> bool:
+        with self._lock:
+            index = self._position.get(task_id)
+            if index is None:
+                return False
+            task = self._heap[index]
+            task.priority = priority
+            task.key = (priority, task.seq)
+            self._sift_up(index)
+            self._sift_down(self._position[task_id])
+            return True
+
+    def peek(self, limit: int = 10, offset: int = 0) -> List[Task]:
+        """Most urgent tasks in order, without removing them or sorting the whole heap"""
+        with self._lock:
+            heap = self._heap
+            wanted = offset + limit
+            result = []
+            # Best-first walk of the heap: O(k log k) for the top k
+            frontier = [(heap[0].key, 0)] if heap else []
+            while frontier and len(result) < wanted:
+                _, index = heapq.heappop(frontier)
+                result.append(heap[index])
+                for child in (2 * index + 1, 2 * index + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child].key, child))
+            return result[offset:]
 
-    def peek_all_tasks(self) -> List[str]:
-        return [f"Priority {p} • {d} • Added at {t.strftime('%Y-%m-%d %H:%M:%S')}" for p, t, d in sorted(self.task_queue)]
+    def peek_all_tasks(self, limit: Optional[int] = None, offset: int = 0) -> List[str]:
+        if limit is None:
+            with self._lock:
+                tasks = sorted(self._heap, key=lambda t: t.key)[offset:]
+        else:
+            tasks = self.peek(limit, offset)
+        return [f"Priority {t.priority} • {t.description} • Added at {t.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+                for t in tasks]
 
 # Example usage
 if __name__ == "__main__":
@@ -1,57 +1,150 @@
 from datetime import datetime
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.jobstores.mongodb import MongoDBJobStore
-from apscheduler.executors.pool import ThreadPoolExecutor
 import os
-from web3 import Web3
-from eth_account import Account
-import json
+import threading
+from nonce_manager import send_with_nonce
+from fee_oracle import TRANSFER_GAS, get_fee_oracle
+from receipt_tracker import get_receipt_tracker
+import mymongodb
+import rpc_pool
+from execution_log import ExecutionLog
+from dispatch import catchup_job_defaults, get_dispatcher
 
-# Configure job store and scheduler
-jobstores = {
-    'default': MongoDBJobStore(host=os.getenv("MONGO_URI", "localhost"), port=27017)
-}
-executors = {
-    'default': ThreadPoolExecutor(20)
-}
-job_defaults = {
-    'coalesce': False,
-    'max_instances': 3
+# Misfire handling follows SCHEDULER_CATCHUP (coalesce, all or skip)
+job_defaults = catchup_job_defaults()
+
+# Push Chain configuration
+PUSH_RPC_URLS = rpc_pool.RPC_URLS  # from PUSH_RPC_URLS
+PUSH_RPC = PUSH_RPC_URLS[0]
+CHAIN_ID = 42101  # Push Chain testnet
+
+# One-off transfers due within the same window run as a single batch job
+BATCH_WINDOW_SECONDS = int(os.getenv("SCHEDULER_BATCH_WINDOW", "10"))
+TRANSFERS_COLLECTION = "scheduled_transfers"
+
+# Recurring payments: one job per (sender, interval) cohort, payees stored as documents
+COHORTS_COLLECTION = "payment_cohorts"
+COHORT_MEMBERS_COLLECTION = "cohort_members"
+COHORT_BATCH_SIZE = int(os.getenv("SCHEDULER_COHORT_BATCH", "500"))
+COHORT_TRIGGERS = {
+    "daily": ("interval", {"days": 1}),
+    "weekly": ("interval", {"weeks": 1}),
+    "monthly": ("cron", {"day": 1, "hour": 9})  # 1st of the month at 09:00
 }
 
-scheduler = BackgroundScheduler(
-    jobstores=jobstores, 
-    executors=executors, 
-    job_defaults=job_defaults
-)
-scheduler.start()
+# Scheduler and Web3 client are created on first use
+_init_lock = threading.Lock()
+_scheduler = None
+_transfers = None
+_cohorts = None
 
-# Push Chain configuration
-PUSH_RPC = "https://evm.rpc-testnet-donut-node2.push.org/"
-w3 = Web3(Web3.HTTPProvider(PUSH_RPC))
+def get_scheduler():
+    """Mongo-backed scheduler, started on first use"""
+    global _scheduler
+    created = False
+    with _init_lock:
+        if _scheduler is None:
+            from apscheduler.schedulers.background import BackgroundScheduler
+            from apscheduler.jobstores.mongodb import MongoDBJobStore
+            from apscheduler.executors.pool import ThreadPoolExecutor
+            
+            # Configure job store and scheduler
+            jobstores = {
+                'default': MongoDBJobStore(host=os.getenv("MONGO_URI", "localhost"), port=27017)
+            }
+            executors = {
+                'default': ThreadPoolExecutor(20)
+            }
+            _scheduler = BackgroundScheduler(
+                jobstores=jobstores, 
+                executors=executors, 
+                job_defaults=job_defaults
+            )
+            _scheduler.start()
+            created = True
+    if created:
+        # Outside the lock: migrating schedules cohort jobs through get_scheduler()
+        try:
+            migrate_recurring_jobs()
+        except Exception as e:
+            print(f"❌ Recurring job migration failed: {str(e)}")
+    return _scheduler
 
-execution_log = []
+def get_web3():
+    """Web3 client for the Push Chain RPC pool"""
+    return rpc_pool.get_pool(PUSH_RPC_URLS).web3
+
+def _best_rpc() -> str:
+    return rpc_pool.get_pool(PUSH_RPC_URLS).best_url()
+
+def _send_cost(transfers: int) -> int:
+    """Dispatcher cost of a send_bulk call: one per JSON-RPC batch request, not per transfer"""
+    from bulk_sender import RPC_BATCH_SIZE
+    return -(-transfers // RPC_BATCH_SIZE)
+
+def get_transfers_collection():
+    """Persistent queue of one-off scheduled transfers"""
+    global _transfers
+    if _transfers is None:
+        transfers = mymongodb.get_client()[mymongodb.DB_NAME][TRANSFERS_COLLECTION]
+        transfers.create_index([("batch_id", 1), ("status", 1)])
+        transfers.create_index("tx_hash")
+        _transfers = transfers
+    return _transfers
+
+def get_cohort_collections():
+    """(cohorts, members) collections backing recurring payments"""
+    global _cohorts
+    if _cohorts is None:
+        db = mymongodb.get_client()[mymongodb.DB_NAME]
+        cohorts, members = db[COHORTS_COLLECTION], db[COHORT_MEMBERS_COLLECTION]
+        cohorts.create_index([("from_address", 1)])
+        # One entry per payee; also the order members are streamed in at fire time
+        members.create_index([("cohort_id", 1), ("to_key", 1)], unique=True)
+        members.create_index([("to_key", 1)])
+        _cohorts = (cohorts, members)
+    return _cohorts
+
+def __getattr__(name):
+    # Keep `Scheduler.scheduler` and `Scheduler.w3` working without eager setup
+    if name == "scheduler":
+        return get_scheduler()
+    if name == "w3":
+        return get_web3()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+execution_log = ExecutionLog(lambda: mymongodb.get_client()[mymongodb.DB_NAME]["execution_log"])
+
+def _record_receipt(tx_hash: str):
+    """Callback that moves a sent transfer's log entry and scheduled_transfers document to its on-chain outcome"""
+    def record(result: dict):
+        execution_log.update_status(tx_hash, result["status"], block_number=result.get("block_number"))
+        get_transfers_collection().update_many(
+            {"tx_hash": tx_hash},
+            {"$set": {"status": result["status"], "block_number": result.get("block_number")}}
+        )
+    return record
 
-def execute_pc_transfer(to_address: str, amount: float, private_key: str, from_address: str):
+def execute_pc_transfer(to_address: str, amount: float, private_key: str, from_address: str,
+                        urgency: str = "normal"):
     """Execute PC token transfer on Push Chain"""
     try:
+        from eth_account import Account
         account = Account.from_key(private_key)
-        nonce = w3.eth.get_transaction_count(from_address)
-        
+        w3 = get_web3()
+        fees = get_fee_oracle().fee_fields(urgency)
         transaction = {
             'to': to_address,
             'value': w3.to_wei(amount, 'ether'),
-            'gas': 21000,
-            'gasPrice': w3.to_wei('20', 'gwei'),
-            'nonce': nonce,
-            'chainId': 42101  # Push Chain testnet
+            'gas': TRANSFER_GAS,
+            **fees,
+            'chainId': CHAIN_ID
         }
         
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        tx_hash, raw_transaction = send_with_nonce(w3, from_address, transaction, private_key)
         
         log_entry = {
             "type": "pc_transfer",
+            "from": from_address,
             "to": to_address,
             "amount": amount,
             "tx_hash": tx_hash.hex(),
@@ -59,6 +152,7 @@ def execute_pc_transfer(to_address: str, amount: float, private_key: str, from_a
             "status": "success"
         }
         execution_log.append(log_entry)
+        get_receipt_tracker().track(tx_hash, raw_transaction, _record_receipt(tx_hash.hex()))
         
         print(f"✅ Executed: {amount} PC to {to_address} | TX: {tx_hash.hex()}")
         return tx_hash.hex()
@@ -66,6 +160,7 @@ def execute_pc_transfer(to_address: str, amount: float, private_key: str, from_a
     except Exception as e:
         log_entry = {
             "type": "pc_transfer",
+            "from": from_address,
             "to": to_address,
             "amount": amount,
             "error": str(e),
@@ -76,66 +171,286 @@ def execute_pc_transfer(to_address: str, amount: float, private_key: str, from_a
         print(f"❌ Transfer failed: {str(e)}")
         return None
 
+def _batch_slot(run_at: datetime) -> datetime:
+    """Round up to the end of the batching window so nothing fires early"""
+    window = BATCH_WINDOW_SECONDS
+    seconds = -(-run_at.timestamp() // window) * window
+    return datetime.fromtimestamp(seconds)
+
 def schedule_pc_transfer(to_address: str, amount: float, run_at: datetime, private_key: str, from_address: str) -> str:
     """Schedule a PC transfer at specified datetime"""
     try:
         if run_at <= datetime.now():
             return "❌ Scheduled time must be in the future"
         
-        job = scheduler.add_job(
-            execute_pc_transfer,
-            'date',
-            run_date=run_at,
-            args=[to_address, amount, private_key, from_address],
-            id=f"pc_transfer_{datetime.now().timestamp()}",
-            replace_existing=True
-        )
+        from apscheduler.jobstores.base import ConflictingIdError
+        batch_at = _batch_slot(run_at)
+        batch_id = f"pc_transfer_batch_{int(batch_at.timestamp())}"
+        
+        get_transfers_collection().insert_one({
+            "batch_id": batch_id,
+            "to_address": to_address,
+            "amount": amount,
+            "private_key": private_key,
+            "from_address": from_address,
+            "run_at": run_at,
+            "status": "scheduled",
+            "created_at": datetime.now()
+        })
+        
+        # Every transfer in the window shares one persisted job
+        try:
+            get_scheduler().add_job(
+                run_transfer_batch,
+                'date',
+                run_date=batch_at,
+                args=[batch_id],
+                id=batch_id,
+                misfire_grace_time=None
+            )
+        except ConflictingIdError:
+            pass
         
         return f"✅ Scheduled {amount} PC to {to_address} on {run_at.strftime('%Y-%m-%d %H:%M:%S')}"
         
     except Exception as e:
         return f"❌ Scheduling failed: {str(e)}"
 
-def schedule_recurring_payment(to_address: str, amount: float, interval: str, private_key: str, from_address: str) -> str:
-    """Schedule recurring PC payments"""
+def _track_receipts(results: list):
+    for result in results:
+        if result.get("tx_hash"):
+            get_receipt_tracker().track(result["tx_hash"], callback=_record_receipt(result["tx_hash"]))
+
+def _send_logged(from_address: str, private_key: str, docs: list, track: bool = True) -> list:
+    """Send to each doc's to_address/amount in one nonce block and log every outcome"""
+    from bulk_sender import send_bulk
+    
+    pairs = [(doc["to_address"], doc["amount"]) for doc in docs]
     try:
-        # Parse interval (daily, weekly, monthly)
-        if interval.lower() == "daily":
-            job = scheduler.add_job(
-                execute_pc_transfer,
-                'interval',
-                days=1,
-                args=[to_address, amount, private_key, from_address],
-                id=f"recurring_daily_{to_address}_{datetime.now().timestamp()}"
-            )
-        elif interval.lower() == "weekly":
-            job = scheduler.add_job(
-                execute_pc_transfer,
-                'interval',
-                weeks=1,
-                args=[to_address, amount, private_key, from_address],
-                id=f"recurring_weekly_{to_address}_{datetime.now().timestamp()}"
-            )
-        elif interval.lower() == "monthly":
-            job = scheduler.add_job(
-                execute_pc_transfer,
-                'cron',
-                day=1,  # First day of each month
-                hour=9,
-                args=[to_address, amount, private_key, from_address],
-                id=f"recurring_monthly_{to_address}_{datetime.now().timestamp()}"
+        results = send_bulk(get_web3(), _best_rpc(), CHAIN_ID, pairs, private_key, from_address)
+    except Exception as e:
+        results = [{"to": to, "amount": amount, "status": "failed", "error": str(e)} for to, amount in pairs]
+    
+    for doc, result in zip(docs, results):
+        # "unknown": sent over a broken connection; the receipt tracker settles it
+        status = result["status"] if result["status"] in ("success", "unknown") else "failed"
+        log_entry = {
+            "type": "pc_transfer",
+            "from": from_address,
+            "to": doc["to_address"],
+            "amount": doc["amount"],
+            "executed_at": datetime.now().isoformat(),
+            "status": status
+        }
+        if result.get("tx_hash"):
+            log_entry["tx_hash"] = result["tx_hash"]
+        if status != "success":
+            log_entry["error"] = result.get("error")
+        execution_log.append(log_entry)
+    if track:
+        _track_receipts(results)
+    return results
+
+def _run_sender_batch(from_address: str, private_key: str, docs: list) -> list:
+    """Send one wallet's share of a batch and record the outcome of each transfer"""
+    from pymongo import UpdateOne
+    
+    results = _send_logged(from_address, private_key, docs, track=False)
+    updates = []
+    for doc, result in zip(docs, results):
+        status = result["status"] if result["status"] in ("success", "unknown") else "failed"
+        updates.append(UpdateOne(
+            {"_id": doc["_id"]},
+            # The key is only needed until the transfer has run
+            {"$set": {"status": status, "tx_hash": result.get("tx_hash"), "error": result.get("error")},
+             "$unset": {"private_key": ""}}
+        ))
+    if updates:
+        get_transfers_collection().bulk_write(updates, ordered=False)
+    # Tracked only once the tx_hash is stored, so an early receipt still finds the document
+    _track_receipts(results)
+    return results
+
+def run_transfer_batch(batch_id: str) -> list:
+    """Execute every transfer in a batch, one nonce block and RPC batch per sender"""
+    transfers = get_transfers_collection()
+    transfers.update_many({"batch_id": batch_id, "status": "scheduled"}, {"$set": {"status": "running"}})
+    
+    by_sender = {}
+    for doc in transfers.find({"batch_id": batch_id, "status": "running"}).sort("run_at", 1):
+        by_sender.setdefault((doc["from_address"], doc["private_key"]), []).append(doc)
+    
+    # Senders run in parallel lanes; each sender's transfers stay in order
+    dispatcher = get_dispatcher()
+    futures = [
+        (docs, dispatcher.submit(from_address, _run_sender_batch, from_address, private_key, docs,
+                                 cost=_send_cost(len(docs)), rpc_url=_best_rpc()))
+        for (from_address, private_key), docs in by_sender.items()
+    ]
+    all_results = []
+    for docs, future in futures:
+        try:
+            all_results.extend(future.result())
+        except Exception as e:
+            all_results.extend({"to": doc["to_address"], "amount": doc["amount"], "status": "failed",
+                                "error": str(e)} for doc in docs)
+            transfers.update_many(
+                {"_id": {"$in": [doc["_id"] for doc in docs]}},
+                {"$set": {"status": "failed", "error": str(e)}, "$unset": {"private_key": ""}}
             )
-        else:
+    
+    sent = sum(1 for r in all_results if r["status"] == "success")
+    print(f"✅ Batch {batch_id}: {sent}/{len(all_results)} transfers sent")
+    return all_results
+
+def _cohort_id(from_address: str, interval: str) -> str:
+    return f"cohort_{interval}_{from_address.lower()}"
+
+def schedule_recurring_payment(to_address: str, amount: float, interval: str, private_key: str, from_address: str) -> str:
+    """Schedule recurring PC payments
+    
+    The payee joins the sender's cohort for that interval; setting up the same
+    payee again updates the amount. The cohort's single job is (re)created
+    whenever it is missing.
+    """
+    try:
+        interval = interval.lower()
+        if interval not in COHORT_TRIGGERS:
             return f"❌ Invalid interval. Use: daily, weekly, or monthly"
         
+        from apscheduler.jobstores.base import ConflictingIdError
+        cohorts, members = get_cohort_collections()
+        cohort_id = _cohort_id(from_address, interval)
+        now = datetime.now()
+        if cohorts.find_one({"_id": cohort_id}, {"_id": 1}) is None:
+            cohorts.update_one(
+                {"_id": cohort_id},
+                {"$setOnInsert": {"from_address": from_address, "private_key": private_key,
+                                  "interval": interval, "created_at": now}},
+                upsert=True
+            )
+        # For an existing cohort this is the only write
+        members.update_one(
+            {"cohort_id": cohort_id, "to_key": to_address.lower()},
+            {"$set": {"to_address": to_address, "amount": amount, "updated_at": now}},
+            upsert=True
+        )
+        
+        # Checked every time so a cohort whose job failed to persist gets one on the next call
+        scheduler = get_scheduler()
+        if scheduler.get_job(cohort_id) is None:
+            trigger, fields = COHORT_TRIGGERS[interval]
+            try:
+                scheduler.add_job(run_cohort, trigger, args=[cohort_id], id=cohort_id, **fields)
+            except ConflictingIdError:
+                pass
+        
         return f"✅ Set up {interval} payment of {amount} PC to {to_address}"
         
     except Exception as e:
         return f"❌ Recurring payment setup failed: {str(e)}"
 
+def remove_recurring_payment(to_address: str, interval: str, from_address: str) -> str:
+    """Stop a payee's recurring payment without touching the rest of the cohort"""
+    try:
+        _, members = get_cohort_collections()
+        cohort_id = _cohort_id(from_address, interval.lower())
+        if members.delete_one({"cohort_id": cohort_id, "to_key": to_address.lower()}).deleted_count:
+            return f"✅ Removed {to_address} from {interval} payments"
+        return f"❌ No {interval} payment to {to_address} from {from_address}"
+    except Exception as e:
+        return f"❌ Failed to remove recurring payment: {str(e)}"
+
+def list_cohort_members(cohort_id: str, limit: int = 100, after: str = None) -> dict:
+    """One page of a cohort's payees; pass next_cursor back as after"""
+    _, members = get_cohort_collections()
+    query = {"cohort_id": cohort_id}
+    if after:
+        query["to_key"] = {"$gt": after}
+    page = list(members.find(query, {"_id": 0, "to_address": 1, "amount": 1, "to_key": 1})
+                .sort("to_key", 1).limit(limit))
+    return {
+        "items": [{"to_address": doc["to_address"], "amount": doc["amount"]} for doc in page],
+        "next_cursor": page[-1]["to_key"] if len(page) == limit else None
+    }
+
+def _cohort_batches(cohort_id: str, batch_size: int):
+    """Stream a cohort's members in key order, one bounded page at a time"""
+    _, members = get_cohort_collections()
+    last = None
+    while True:
+        query = {"cohort_id": cohort_id}
+        if last is not None:
+            query["to_key"] = {"$gt": last}
+        page = list(members.find(query).sort("to_key", 1).limit(batch_size))
+        if not page:
+            return
+        yield page
+        if len(page) < batch_size:
+            return
+        last = page[-1]["to_key"]
+
+def run_cohort(cohort_id: str, batch_size: int = COHORT_BATCH_SIZE) -> dict:
+    """Pay every member of a cohort, streaming members through the sender's dispatch lane"""
+    cohorts, _ = get_cohort_collections()
+    cohort = cohorts.find_one({"_id": cohort_id})
+    if cohort is None:
+        print(f"❌ Cohort {cohort_id} no longer exists")
+        return {"cohort_id": cohort_id, "sent": 0, "unknown": 0, "failed": 0}
+    from_address, private_key = cohort["from_address"], cohort["private_key"]
+    
+    dispatcher = get_dispatcher()
+    sent = unknown = failed = 0
+    in_flight = []
+    
+    def collect(docs, future):
+        nonlocal sent, unknown, failed
+        try:
+            results = future.result()
+        except Exception:
+            failed += len(docs)
+            return
+        for result in results:
+            if result["status"] == "success":
+                sent += 1
+            elif result["status"] == "unknown":
+                unknown += 1
+            else:
+                failed += 1
+    
+    for docs in _cohort_batches(cohort_id, batch_size):
+        in_flight.append((docs, dispatcher.submit(from_address, _send_logged, from_address, private_key, docs,
+                                                  cost=_send_cost(len(docs)), rpc_url=_best_rpc())))
+        # Read one page ahead of the lane, never the whole cohort
+        if len(in_flight) > 1:
+            collect(*in_flight.pop(0))
+    for docs, future in in_flight:
+        collect(docs, future)
+    
+    cohorts.update_one({"_id": cohort_id}, {"$set": {"last_run_at": datetime.now(), "last_sent": sent,
+                                                     "last_unknown": unknown, "last_failed": failed}})
+    print(f"✅ Cohort {cohort_id}: {sent}/{sent + unknown + failed} payments sent, {unknown} awaiting receipts")
+    return {"cohort_id": cohort_id, "sent": sent, "unknown": unknown, "failed": failed}
+
+def migrate_recurring_jobs() -> int:
+    """Fold legacy one-job-per-payee recurring jobs into cohorts; returns how many were moved
+
+    Runs once when the scheduler starts, so old jobs stop firing outside the dispatcher lanes.
+    """
+    moved = 0
+    for job in get_scheduler().get_jobs():
+        if not job.id.startswith("recurring_") or job.func is not execute_pc_transfer:
+            continue
+        interval = job.id.split("_")[1]
+        to_address, amount, private_key, from_address = job.args[:4]
+        if schedule_recurring_payment(to_address, amount, interval, private_key, from_address).startswith("✅"):
+            job.remove()
+            moved += 1
+    return moved
+
 def list_scheduled_jobs() -> list:
     """List all active scheduled jobs"""
-    jobs = scheduler.get_jobs()
+    jobs = get_scheduler().get_jobs()
     job_list = []
     
     for job in jobs:
@@ -150,13 +465,22 @@ def list_scheduled_jobs() -> list:
     return job_list
 
 def cancel_job(job_id: str) -> str:
-    """Cancel a scheduled job"""
+    """Cancel a scheduled job (for a cohort, its payees too)"""
     try:
-        scheduler.remove_job(job_id)
+        get_scheduler().remove_job(job_id)
+        if job_id.startswith("cohort_"):
+            cohorts, members = get_cohort_collections()
+            members.delete_many({"cohort_id": job_id})
+            cohorts.delete_one({"_id": job_id})
         return f"✅ Cancelled job: {job_id}"
     except Exception as e:
         return f"❌ Failed to cancel job: {str(e)}"
 
-def get_execution_log() -> list:
-    """Get history of executed payments"""
-    return execution_log
\ No newline at end of file
+def get_execution_log(limit: int = 50, sender: str = None, recipient: str = None, status: str = None,
+                      since: str = None, until: str = None, cursor: str = None) -> dict:
+    """Get history of executed payments, newest first, filtered and paginated"""
+    try:
+        return execution_log.query(sender, recipient, status, since, until, limit, cursor)
+    except Exception as e:
+        # Storage unavailable: fall back to the recent in-memory entries
+        return {"items": execution_log.recent(limit), "next_cursor": None, "error": str(e)}
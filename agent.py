@@ -1,79 +1,96 @@
-import google.generativeai as genai
-from google.adk.agents import Agent
 import mymongodb as mymongodb
+import Scheduler
 from explorer import *
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
-import json
+import threading
 import parsedatetime
-from apscheduler.schedulers.background import BackgroundScheduler
-from CoinGecko import CoinGeckoToken
-from web3 import Web3
-from eth_account import Account
-import requests
+import metrics
+import rpc_pool
+from nonce_manager import send_with_nonce
+from fee_oracle import TRANSFER_GAS, get_fee_oracle
+from receipt_tracker import get_receipt_tracker
+from token_registry import TokenRegistry
+from async_chain import AsyncPushChainHandler, run_sync
+from prompt_cache import PromptCache
 
-schedule_engine = BackgroundScheduler()
-schedule_engine.start()
+# Heavy clients (Web3, Gemini, ADK agent) are created on first use
+_init_lock = threading.RLock()
+_gemini = None
+_gemini_model = None
+_push_agent = None
+_token_registry = None
 
 # Push Chain Testnet Configuration
 network = {
     "chain_id": 42101,
-    "rpc": "https://evm.rpc-testnet-donut-node2.push.org/",
+    "rpc": rpc_pool.RPC_URLS[0],
+    "rpc_urls": rpc_pool.RPC_URLS,  # PUSH_RPC_URLS, failed over and latency-routed
     "name": "Push Protocol Testnet",
     "explorer": "https://donut.push.network/",
     "native_token": "PC"
 }
 
-# Initialize Web3 with Push Chain RPC
-w3 = Web3(Web3.HTTPProvider(network["rpc"]))
+def get_web3():
+    """Web3 client for the Push Chain RPC pool"""
+    return rpc_pool.get_pool(network["rpc_urls"]).web3
 
 class PushChainHandler:
     def __init__(self, network_config):
-        self.w3 = Web3(Web3.HTTPProvider(network_config["rpc"]))
+        self.rpc_urls = network_config.get("rpc_urls") or [network_config["rpc"]]
         self.chain_id = network_config["chain_id"]
+        self.async_handler = AsyncPushChainHandler(network_config)
+    
+    @property
+    def rpc_url(self) -> str:
+        """Currently best endpoint, for raw JSON-RPC batches"""
+        return rpc_pool.get_pool(self.rpc_urls).best_url()
+    
+    @property
+    def w3(self):
+        return rpc_pool.get_pool(self.rpc_urls).web3
         
-    def send_transaction(self, to_address: str, amount: float, private_key: str, from_address: str) -> str:
+    def send_transaction(self, to_address: str, amount: float, private_key: str, from_address: str,
+                         urgency: str = "normal") -> str:
         """Send PC tokens on Push Chain"""
         try:
+            from eth_account import Account
             account = Account.from_key(private_key)
-            nonce = self.w3.eth.get_transaction_count(from_address)
-            
+            fees = get_fee_oracle().fee_fields(urgency)
             transaction = {
                 'to': to_address,
                 'value': self.w3.to_wei(amount, 'ether'),
-                'gas': 21000,
-                'gasPrice': self.w3.to_wei('20', 'gwei'),
-                'nonce': nonce,
+                'gas': TRANSFER_GAS,
+                **fees,
                 'chainId': self.chain_id
             }
             
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            tx_hash, raw_transaction = send_with_nonce(self.w3, from_address, transaction, private_key)
+            get_receipt_tracker().track(tx_hash, raw_transaction)
             return f"Transaction sent: {tx_hash.hex()}"
         except Exception as e:
             return f"Transaction failed: {str(e)}"
     
+    def send_bulk_transactions(self, transfers: list, private_key: str, from_address: str,
+                               urgency: str = "normal") -> list:
+        """Send PC tokens to many recipients with batched signing and broadcast"""
+        try:
+            from bulk_sender import send_bulk
+            return send_bulk(self.w3, self.rpc_url, self.chain_id, transfers, private_key, from_address, urgency)
+        except Exception as e:
+            return [{"to": to, "amount": amount, "status": "failed", "error": str(e)} for to, amount in transfers]
+    
     def get_balance(self, address: str) -> float:
         """Get PC balance for address"""
         try:
-            balance_wei = self.w3.eth.get_balance(address)
-            balance_pc = self.w3.from_wei(balance_wei, 'ether')
-            return float(balance_pc)
+            return run_sync(self.async_handler.get_balances([address]))[0]
         except Exception as e:
             return f"Error getting balance: {str(e)}"
     
     def get_transaction_by_hash(self, tx_hash: str) -> dict:
         """Get transaction details by hash"""
         try:
-            tx = self.w3.eth.get_transaction(tx_hash)
-            return {
-                "hash": tx_hash,
-                "from": tx['from'],
-                "to": tx['to'],
-                "value": self.w3.from_wei(tx['value'], 'ether'),
-                "gas": tx['gas'],
-                "gasPrice": self.w3.from_wei(tx['gasPrice'], 'gwei')
-            }
+            return run_sync(self.async_handler.get_transactions_by_hash([tx_hash]))[0]
         except Exception as e:
             return {"error": str(e)}
 
@@ -88,9 +105,13 @@ class PushChainHandler:
 
 handler = PushChainHandler(network)
 
-def transmit(to: str, value: float, private_key: str, from_address: str) -> str:
-    """Send PC tokens to an address"""
-    return handler.send_transaction(to, value, private_key, from_address)
+def transmit(to: str, value: float, private_key: str, from_address: str, urgency: str = "normal") -> str:
+    """Send PC tokens to an address (urgency: low, normal or high)"""
+    return handler.send_transaction(to, value, private_key, from_address, urgency)
+
+def bulk_transmit(transfers: list, private_key: str, from_address: str, urgency: str = "normal") -> list:
+    """Send PC tokens to many recipients given as [address, amount] pairs"""
+    return handler.send_bulk_transactions(transfers, private_key, from_address, urgency)
 
 def tx_lookup(tx_hash: str) -> dict:
     """Look up transaction by hash"""
@@ -101,6 +122,24 @@ def balance_query(address: str) -> str:
     balance = handler.get_balance(address)
     return f"PC Balance: {balance}"
 
+def balances_query(addresses: list) -> list:
+    """Get PC balances for many addresses at once"""
+    return run_sync(handler.async_handler.get_balances(addresses))
+
+def portfolio_query(addresses: list) -> dict:
+    """Non-zero ERC-20 balances across the Push Chain token list for one or more addresses"""
+    try:
+        from portfolio import get_portfolio
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        return get_portfolio(get_token_registry()).query(addresses)
+    except Exception as e:
+        return {"error": str(e)}
+
+def tx_lookup_many(tx_hashes: list) -> list:
+    """Look up many transactions by hash at once"""
+    return run_sync(handler.async_handler.get_transactions_by_hash(tx_hashes))
+
 def issue_token(name: str, symbol: str, private_key: str, deployer_address: str) -> str:
     """Deploy new token on Push Chain"""
     return handler.deploy_token(deployer_address, name, symbol, private_key)
@@ -118,17 +157,8 @@ def future_send(to: str, amount: float, when: str, private_key: str, from_addres
     if scheduled_time <= datetime.now():
         return "Scheduled time must be in the future"
     
-    def execute_transfer():
-        result = transmit(to, amount, private_key, from_address)
-        print(f"Scheduled transfer executed: {result}")
-    
-    schedule_engine.add_job(
-        execute_transfer, 
-        'date', 
-        run_date=scheduled_time
-    )
-    
-    return f"✅ Scheduled {amount} PC to {to} on {scheduled_time.strftime('%Y-%m-%d %H:%M:%S')}"
+    # Persisted and batched by the shared Scheduler engine
+    return Scheduler.schedule_pc_transfer(to, amount, scheduled_time, private_key, from_address)
 
 def get_push_token_info() -> str:
     """Get Push token information"""
@@ -138,42 +168,111 @@ def get_push_token_info() -> str:
     except Exception as e:
         return f"Error fetching token info: {str(e)}"
 
+def price_analytics(days: int = 30, interval: str = "1d", token_id: str = "push-protocol") -> dict:
+    """OHLC candles, moving averages and volatility from locally cached price history"""
+    try:
+        from price_history import get_price_history
+        return get_price_history(token_id).analyze(days, interval)
+    except Exception as e:
+        return {"error": str(e)}
+
 def create_payment_link(amount: float, recipient: str) -> str:
     """Generate payment link for Push Chain"""
     link = f"https://pay.push.network/?amount={amount}&to={recipient}&chain=42101"
     return f"Payment link created: {link}"
 
-# Configure Gemini AI
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+def get_gemini():
+    """Configured google.generativeai module"""
+    global _gemini
+    with _init_lock:
+        if _gemini is None:
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            _gemini = genai
+    return _gemini
+
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# Repeated questions ("what is Push Chain") are answered from memory
+prompt_cache = PromptCache(
+    max_bytes=int(os.getenv("GEMINI_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+    ttl=float(os.getenv("GEMINI_CACHE_TTL", "3600")),
+    near_duplicates=os.getenv("GEMINI_CACHE_NEAR_DUPLICATES", "0") == "1"
+)
+_llm_usage = {"calls": 0, "prompt_tokens": 0, "output_tokens": 0}
+_llm_usage_lock = threading.Lock()
+
+def get_gemini_model():
+    """Shared GenerativeModel, created once"""
+    global _gemini_model
+    with _init_lock:
+        if _gemini_model is None:
+            _gemini_model = get_gemini().GenerativeModel(GEMINI_MODEL)
+    return _gemini_model
+
+def set_gemini_model(model):
+    """Use another model object (anything with generate_content(prompt) -> .text), e.g. a local stub"""
+    global _gemini_model
+    with _init_lock:
+        _gemini_model = model
+    prompt_cache.clear()
+
+def _generate(query: str) -> str:
+    with metrics.span("llm", GEMINI_MODEL):
+        response = get_gemini_model().generate_content(f"As a Push Chain AI agent: {query}")
+    usage = getattr(response, "usage_metadata", None)
+    with _llm_usage_lock:
+        _llm_usage["calls"] += 1
+        if usage is not None:
+            _llm_usage["prompt_tokens"] += getattr(usage, "prompt_token_count", 0) or 0
+            _llm_usage["output_tokens"] += getattr(usage, "candidates_token_count", 0) or 0
+    return response.text
+
+def get_llm_stats() -> dict:
+    """Upstream Gemini calls and token spend, plus prompt cache effectiveness"""
+    with _llm_usage_lock:
+        usage = dict(_llm_usage)
+    return {"usage": usage, "cache": prompt_cache.stats()}
 
 def ai_response(query: str) -> str:
     """Generate AI response using Gemini"""
     try:
-        model = genai.GenerativeModel("gemini-2.5-flash")
-        response = model.generate_content(f"As a Push Chain AI agent: {query}")
-        return response.text
+        return prompt_cache.get_or_generate(query, _generate)
     except Exception as e:
         return f"AI response error: {str(e)}"
 
-# Load real Push Chain tokens
-with open("tokensList.json", "r") as f:
-    push_tokens = json.load(f)
+def get_token_registry() -> TokenRegistry:
+    """Indexed Push Chain tokens list, loaded on first lookup"""
+    global _token_registry
+    with _init_lock:
+        if _token_registry is None:
+            _token_registry = TokenRegistry()
+    return _token_registry
 
 def find_token_by_symbol(symbol: str) -> dict:
     """Find token by symbol from Push Chain tokens list"""
-    for token in push_tokens.get("items", []):
-        if token.get("symbol", "").upper() == symbol.upper():
-            return token
+    token_registry = get_token_registry()
+    token = token_registry.find_by_symbol(symbol)
+    if token:
+        return token
+    suggestions = [match.get("symbol") for match in token_registry.fuzzy(symbol)]
+    if suggestions:
+        return {"error": f"Token {symbol} not found", "did_you_mean": suggestions}
     return {"error": f"Token {symbol} not found"}
 
 # Agent tools
-tools = [
+tools = [metrics.instrument_tool(tool) for tool in [
     transmit, 
+    bulk_transmit,
     tx_lookup, 
+    tx_lookup_many,
     balance_query, 
+    balances_query,
+    portfolio_query,
     issue_token, 
     future_send,
     get_push_token_info,
+    price_analytics,
     create_payment_link,
     find_token_by_symbol,
     ai_response
@@ -182,14 +281,25 @@ tools = [
     get_block_data, 
     get_market_chart_data,
     get_token_holders
-]
+]]
 
 # Initialize the real Push Chain agent
-push_agent = Agent(
-    model='gemini-2.5-flash',
-    name='PushChainAgent',
-    description='AI-powered blockchain agent for Push Protocol',
-    instruction='''You are an intelligent blockchain agent operating on Push Chain (testnet). 
+def get_push_agent():
+    """ADK agent wired with every Push Chain tool"""
+    global _push_agent
+    with _init_lock:
+        if _push_agent is None:
+            from google.adk.agents import Agent
+            metrics.serve()
+            if USE_LOCAL_INDEX:
+                # The explorer only answers from the local index while a follower keeps it fresh
+                from indexer import get_indexer
+                get_indexer().start()
+            _push_agent = Agent(
+                model='gemini-2.5-flash',
+                name='PushChainAgent',
+                description='AI-powered blockchain agent for Push Protocol',
+                instruction='''You are an intelligent blockchain agent operating on Push Chain (testnet). 
     You can help users with:
     - Sending PC tokens and scheduling payments
     - Deploying tokens and smart contracts  
@@ -200,5 +310,18 @@ push_agent = Agent(
 
     
     Always prioritize security and confirm transactions with users.''',
-    tools=tools
-)
+                tools=tools
+            )
+    return _push_agent
+
+def __getattr__(name):
+    # Keep `agent.push_agent`, `agent.w3` and `agent.schedule_engine` working without eager setup
+    accessors = {
+        "push_agent": get_push_agent,
+        "w3": get_web3,
+        "schedule_engine": Scheduler.get_scheduler,
+        "token_registry": get_token_registry
+    }
+    if name in accessors:
+        return accessors[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
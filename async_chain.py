@@ -0,0 +1,143 @@
+import asyncio
+import contextvars
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import rpc_pool
+
+# Dedicated event loop so sync callers (tools, scheduler jobs) can drive async code
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-chain", daemon=True).start()
+    return _loop
+
+def run_sync(coro) -> Any:
+    """Run a coroutine to completion from synchronous code, even inside a running loop"""
+    # The loop thread starts the task in the caller's context, so spans land on the calling tool
+    context = contextvars.copy_context()
+    return context.run(asyncio.run_coroutine_threadsafe, coro, _get_loop()).result()
+
+class RPCError(Exception):
+    pass
+
+class BatchUnsupported(RPCError):
+    pass
+
+class AsyncPushChainHandler:
+    """Concurrent balance and transaction lookups over the RPC pool, batched as JSON-RPC where supported"""
+
+    def __init__(self, network_config: Dict, max_concurrency: int = 8, batch_size: int = 100):
+        self.rpc_urls = network_config.get("rpc_urls") or [network_config["rpc"]]
+        self.chain_id = network_config["chain_id"]
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.batch_supported = True
+
+    @property
+    def pool(self) -> rpc_pool.RPCPool:
+        """Shared endpoint pool: every request goes to the best endpoint and fails over like sync reads"""
+        return rpc_pool.get_pool(self.rpc_urls)
+
+    async def _post_batch(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        response = await self.pool.async_post(payload)
+        replies = response.json()
+        if response.status_code != 200:
+            raise RPCError(f"RPC error: {response.status_code}")
+        if not isinstance(replies, list):
+            raise BatchUnsupported(f"batch rejected: {replies}")
+
+        by_id = {reply.get("id"): reply for reply in replies}
+        results = []
+        for i in range(len(calls)):
+            reply = by_id.get(i)
+            if reply is None:
+                results.append(RPCError("missing reply"))
+            elif "error" in reply:
+                results.append(RPCError(reply["error"].get("message", str(reply["error"]))))
+            else:
+                results.append(reply.get("result"))
+        return results
+
+    async def _call_each(self, calls: Sequence[Tuple[str, list]], semaphore: asyncio.Semaphore) -> List[Any]:
+        async def one(method, params):
+            async with semaphore:
+                try:
+                    reply = await self.pool.async_post({"jsonrpc": "2.0", "id": 0, "method": method, "params": params})
+                except Exception as e:
+                    return e
+            if reply.status_code != 200:
+                return RPCError(f"RPC error: {reply.status_code}")
+            response = reply.json()
+            if "error" in response:
+                error = response["error"]
+                return RPCError(error.get("message", str(error)) if isinstance(error, dict) else str(error))
+            return response.get("result")
+
+        return await asyncio.gather(*(one(method, params) for method, params in calls))
+
+    async def call_many(self, calls: Sequence[Tuple[str, list]]) -> List[Any]:
+        """Run JSON-RPC calls with bounded concurrency; results (or exceptions) keep input order"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        chunks = [calls[i:i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+
+        async def run_chunk(chunk):
+            if self.batch_supported and len(chunk) > 1:
+                try:
+                    async with semaphore:
+                        return await self._post_batch(chunk)
+                except BatchUnsupported:
+                    self.batch_supported = False
+                except Exception:
+                    pass
+                # Fall back to concurrent single calls for this chunk
+            return await self._call_each(chunk, semaphore)
+
+        results = []
+        for chunk_results in await asyncio.gather(*(run_chunk(chunk) for chunk in chunks)):
+            results.extend(chunk_results)
+        return results
+
+    async def get_balances(self, addresses: Sequence[str]) -> List[Any]:
+        """PC balances for many addresses, in input order (error strings for failures)"""
+        from web3 import Web3
+        valid = [i for i, address in enumerate(addresses) if Web3.is_address(address)]
+        replies = await self.call_many([("eth_getBalance", [addresses[i], "latest"]) for i in valid])
+
+        results: List[Any] = [f"Error getting balance: invalid address {address}" for address in addresses]
+        for i, reply in zip(valid, replies):
+            if isinstance(reply, Exception):
+                results[i] = f"Error getting balance: {str(reply)}"
+            else:
+                results[i] = float(Web3.from_wei(int(reply, 16), 'ether'))
+        return results
+
+    async def get_transactions_by_hash(self, hashes: Sequence[str]) -> List[Dict]:
+        """Transaction details for many hashes, in input order"""
+        from web3 import Web3
+        replies = await self.call_many([("eth_getTransactionByHash", [tx_hash]) for tx_hash in hashes])
+
+        results = []
+        for tx_hash, tx in zip(hashes, replies):
+            if isinstance(tx, Exception):
+                results.append({"error": str(tx)})
+            elif tx is None:
+                results.append({"error": f"Transaction {tx_hash} not found"})
+            else:
+                results.append({
+                    "hash": tx_hash,
+                    "from": Web3.to_checksum_address(tx["from"]),
+                    "to": Web3.to_checksum_address(tx["to"]) if tx.get("to") else None,
+                    "value": Web3.from_wei(int(tx["value"], 16), 'ether'),
+                    "gas": int(tx["gas"], 16),
+                    "gasPrice": Web3.from_wei(int(tx["gasPrice"], 16), 'gwei')
+                })
+        return results
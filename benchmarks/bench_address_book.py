@@ -0,0 +1,79 @@
+"""Address book search latency benchmark against a real MongoDB.
+
+Fills a scratch database with 1k .. 1M synthetic contacts and times prefix
+search, address search and the first page of list_all_users at each size.
+Latency should stay flat as the collection grows; the query plan of each
+search is reported so a fallback to COLLSCAN is visible. Output is JSON.
+
+    MONGO_URI=mongodb://localhost:27017/ python benchmarks/bench_address_book.py
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mymongodb
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+def fill(collection, start: int, stop: int):
+    batch = []
+    for i in range(start, stop):
+        username = f"user{i:07d}"
+        address = "0x%040x" % random.getrandbits(160)
+        batch.append({"username": username, **mymongodb._normalized_fields(username, address)})
+        if len(batch) == 10_000:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+def timed(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+def winning_stage(collection, filters) -> str:
+    plan = collection.find(filters).explain()["queryPlanner"]["winningPlan"]
+    while "inputStage" in plan:
+        plan = plan["inputStage"]
+    return plan.get("stage", "?")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="PushChainAgentBench")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--sizes", type=int, nargs="*", default=SIZES)
+    args = parser.parse_args()
+
+    mymongodb.DB_NAME = args.db
+    mymongodb.get_client().drop_database(args.db)
+    collection = mymongodb.get_collection()
+
+    results = []
+    filled = 0
+    for size in sorted(args.sizes):
+        fill(collection, filled, size)
+        filled = size
+        probe = f"user{random.randrange(size):07d}"[:8]
+        results.append({
+            "entries": size,
+            "username_prefix_ms": timed(lambda: mymongodb.search_users(probe), args.repeats),
+            "address_prefix_ms": timed(lambda: mymongodb.search_users("0xabc"), args.repeats),
+            "list_first_page_ms": timed(lambda: mymongodb.list_all_users(), args.repeats),
+            "username_plan": winning_stage(collection, mymongodb._prefix_filter("username_lc", probe)),
+            "address_plan": winning_stage(collection, mymongodb._prefix_filter("address_lc", "0xabc"))
+        })
+
+    mymongodb.get_client().drop_database(args.db)
+    print(json.dumps({"benchmark": "address_book_search", "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""ai_response latency and token spend against a local stub model.
+
+Replays a skewed workload of user questions (a few very common ones,
+rephrased, plus a long tail) through ai_response from several threads,
+once with the prompt cache and once calling the model directly. Reports
+p50/p95 latency, upstream calls and tokens as JSON.
+
+    python benchmarks/bench_ai_response.py --requests 500 --model-latency-ms 800
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stubs import StubModel
+
+COMMON = [
+    ["What is Push Chain?", "what is push chain", "Tell me what Push Chain is", "What's Push Chain??"],
+    ["How do I get testnet PC tokens?", "how do i get  testnet PC tokens"],
+    ["Is Push Chain EVM compatible?", "is push chain evm compatible ?"],
+    ["How fast are Push Chain blocks?", "How fast are push chain blocks"]
+]
+
+def workload(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    prompts = []
+    for i in range(count):
+        if rng.random() < 0.7:
+            prompts.append(rng.choice(rng.choice(COMMON)))
+        else:
+            prompts.append(f"Explain transaction {rng.randrange(10**6)} on Push Chain")
+    return prompts
+
+def run(fn, prompts: list, concurrency: int) -> dict:
+    latencies = []
+
+    def one(prompt):
+        start = time.perf_counter()
+        fn(prompt)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, prompts))
+    ordered = sorted(latencies)
+    return {
+        "seconds": round(time.perf_counter() - start, 3),
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--model-latency-ms", type=float, default=800)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    import agent
+    prompts = workload(args.requests, args.seed)
+    results = []
+
+    model = StubModel(latency=args.model_latency_ms / 1000)
+    agent.set_gemini_model(model)
+    results.append({"name": "uncached", **run(agent._generate, prompts, args.concurrency),
+                    **agent.get_llm_stats()["usage"]})
+
+    model = StubModel(latency=args.model_latency_ms / 1000)
+    agent.set_gemini_model(model)
+    before = agent.get_llm_stats()["usage"]
+    timing = run(agent.ai_response, prompts, args.concurrency)
+    after = agent.get_llm_stats()
+    usage = {key: after["usage"][key] - before[key] for key in before}
+    results.append({"name": "cached", **timing, **usage, "cache": after["cache"]})
+
+    print(json.dumps({"settings": vars(args), "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Cold-start import benchmark for the agent modules.
+
+Each module is imported in a fresh interpreter several times and the median
+wall time is reported as JSON. Pass --max-ms to fail when a module regresses.
+
+    python benchmarks/bench_import.py --runs 5 --max-ms 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["agent", "Scheduler", "mymongodb", "explorer", "CoinGecko"]
+
+SNIPPET = (
+    "import time, sys\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "heavy = [m for m in ('web3', 'google.generativeai', 'google.adk', 'apscheduler') if m in sys.modules]\n"
+    "print(elapsed, ','.join(heavy))\n"
+)
+
+def measure(module: str, runs: int) -> dict:
+    timings = []
+    heavy = ""
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(module=module)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append(float(output[0]) * 1000)
+        heavy = output[1] if len(output) > 1 else ""
+    return {
+        "module": module,
+        "runs": runs,
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "heavy_imports": heavy.split(",") if heavy else []
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if any median exceeds this")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    results = [measure(module, args.runs) for module in args.modules]
+    print(json.dumps({"benchmark": "import_time", "results": results}, indent=2))
+
+    if args.max_ms is not None and any(r["median_ms"] > args.max_ms for r in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
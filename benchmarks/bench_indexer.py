@@ -0,0 +1,135 @@
+"""ChainIndexer follow, reorg and backfill against the local chain stub.
+
+Builds a chain of ERC-20 Transfer logs on ChainStub, starts the indexer
+at the head, follows new blocks, rolls back a reorg and backfills history
+to genesis, checking after every phase that the stored balances match the
+stub's canonical chain. Also checks that a stale checkpoint stops the
+explorer from trusting the local index. Reports blocks/sec per phase as
+JSON and exits non-zero on any mismatch.
+
+    python benchmarks/bench_indexer.py --blocks 2000 --transfers-per-block 5
+
+Requires mongomock (pip install mongomock).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stubs import ChainStub
+
+TOKEN = "0x" + "7e" * 20
+
+def emit_blocks(chain: ChainStub, rng: random.Random, holders: list, blocks: int, per_block: int):
+    for _ in range(blocks):
+        for _ in range(per_block):
+            sender, recipient = rng.sample(holders, 2)
+            chain.emit_transfer(TOKEN, sender, recipient, rng.randrange(1, 10**20))
+        chain.mine()
+
+def expected_balances(chain: ChainStub, first: int, last: int) -> dict:
+    balances = {}
+    for number in range(first, last + 1):
+        for log in chain.logs.get(number, []):
+            sender, recipient = "0x" + log["topics"][1][-40:], "0x" + log["topics"][2][-40:]
+            value = int(log["data"], 16)
+            balances[sender] = balances.get(sender, 0) - value
+            balances[recipient] = balances.get(recipient, 0) + value
+    return {holder: balance for holder, balance in balances.items() if balance}
+
+def check(indexer, chain: ChainStub, phase: str):
+    state = indexer.checkpoint()
+    expected = expected_balances(chain, state["first_block"], state["last_block"])
+    stored = {doc["holder"]: int(doc["balance"].to_decimal())
+              for doc in indexer.db.token_balances.find({"token": TOKEN})}
+    stored = {holder: balance for holder, balance in stored.items() if balance}
+    if stored != expected:
+        raise RuntimeError(f"{phase}: balances differ from the chain ({len(stored)} vs {len(expected)} holders)")
+    canonical = chain.blocks[state["last_block"]]["hash"]
+    if state["last_hash"] != canonical:
+        raise RuntimeError(f"{phase}: checkpoint hash {state['last_hash']} is not canonical {canonical}")
+
+def timed(name: str, fn) -> dict:
+    start = time.perf_counter()
+    blocks = fn()
+    elapsed = time.perf_counter() - start
+    return {"phase": name, "blocks": blocks, "seconds": round(elapsed, 3),
+            "blocks_per_sec": round(blocks / elapsed, 1) if elapsed else None}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=1000, help="history before the indexer starts")
+    parser.add_argument("--follow-blocks", type=int, default=200)
+    parser.add_argument("--transfers-per-block", type=int, default=3)
+    parser.add_argument("--holders", type=int, default=50)
+    parser.add_argument("--reorg-depth", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    import mongomock
+    from web3 import Web3
+    from indexer import ChainIndexer
+    import explorer
+
+    rng = random.Random(args.seed)
+    holders = ["0x%040x" % (0xB0B0 + i) for i in range(args.holders)]
+    chain = ChainStub()
+    w3 = Web3(Web3.HTTPProvider(chain.start()))
+    db = mongomock.MongoClient()["indexer_bench"]
+    indexer = ChainIndexer(w3=w3, db=db, confirmations=2, range_size=100)
+
+    emit_blocks(chain, rng, holders, args.blocks, args.transfers_per_block)
+    results = []
+
+    # Start at the head, then follow new blocks as they arrive
+    indexer.run_once()
+    check(indexer, chain, "start")
+    emit_blocks(chain, rng, holders, args.follow_blocks, args.transfers_per_block)
+    results.append(timed("follow", lambda: indexer.run_once(max_blocks=10**9)))
+    check(indexer, chain, "follow")
+
+    # Replace indexed blocks: their transfers must be rolled back
+    tip = indexer.checkpoint()["last_block"]
+    chain.reorg(args.reorg_depth + indexer.confirmations)
+    emit_blocks(chain, rng, holders, args.reorg_depth, args.transfers_per_block)
+    results.append(timed("reorg", lambda: indexer.run_once(max_blocks=10**9)))
+    check(indexer, chain, "reorg")
+    orphaned = [doc["block_number"] for doc in db.token_transfers.find({"block_number": {"$gt": tip - args.reorg_depth}})
+                if chain.logs.get(doc["block_number"]) is None
+                or doc["tx_hash"] not in {log["transactionHash"] for log in chain.logs[doc["block_number"]]}]
+    if orphaned:
+        raise RuntimeError(f"reorg: {len(orphaned)} transfers from replaced blocks are still stored")
+
+    # Backfill history to genesis
+    first = indexer.checkpoint()["first_block"]
+    results.append(timed("backfill", lambda: indexer.backfill(0, first - 1)))
+    check(indexer, chain, "backfill")
+    if not indexer.is_complete():
+        raise RuntimeError("backfill: index should be complete and fresh")
+
+    # A follower that stopped checking in must not be trusted by the explorer
+    explorer.USE_LOCAL_INDEX = True
+    import indexer as indexer_module
+    indexer_module._indexer = indexer
+    if explorer._from_local_index("transactions_for", holders[0]) is None:
+        raise RuntimeError("fresh index: explorer fell back to the remote API")
+    db.indexer_state.update_one({"_id": "push_chain"},
+                                {"$set": {"updated_at": datetime.now(timezone.utc) - timedelta(hours=1)}})
+    if indexer.is_complete() or explorer._from_local_index("transactions_for", holders[0]) is not None:
+        raise RuntimeError("stale index: explorer still answered from the local index")
+    indexer.run_once()
+    if not indexer.is_complete():
+        raise RuntimeError("caught-up follower did not refresh the checkpoint")
+
+    print(json.dumps({"settings": vars(args), "head": len(chain.blocks) - 1,
+                      "transfers": db.token_transfers.count_documents({}), "results": results,
+                      "checks": "passed"}, indent=2))
+
+if __name__ == "__main__":
+    main()
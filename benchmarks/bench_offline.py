@@ -0,0 +1,204 @@
+"""Offline end-to-end benchmark suite.
+
+Runs the agent's hot paths against local stand-ins: a JSON-RPC chain stub
+in place of PUSH_RPC, an HTTP stub for PUSH_CHAIN_API_BASE and CoinGecko,
+and mongomock in place of MongoDB. Nothing leaves the machine, so numbers
+are comparable between commits:
+
+    python benchmarks/bench_offline.py --output before.json
+    git checkout other-branch
+    python benchmarks/bench_offline.py --output after.json
+
+Requires mongomock (pip install mongomock).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stubs import ChainStub, HTTPStub
+
+def percentiles(samples_ms) -> dict:
+    ordered = sorted(samples_ms)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1 if len(ordered) > 1 else 0], 3),
+        "max_ms": round(ordered[-1], 3)
+    }
+
+def rate(name: str, count: int, seconds: float, **extra) -> dict:
+    return {"name": name, "ops": count, "seconds": round(seconds, 3),
+            "ops_per_sec": round(count / seconds, 1) if seconds else None, **extra}
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def wire(rpc_url: str, http_url: str):
+    """Point every module at the local stand-ins"""
+    os.environ["PUSH_RPC_URLS"] = rpc_url
+    import mongomock
+    import mymongodb
+    import Scheduler
+    import explorer
+    import CoinGecko
+    import agent
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.executors.pool import ThreadPoolExecutor
+
+    mymongodb._client = mongomock.MongoClient()
+    Scheduler._scheduler = BackgroundScheduler(
+        executors={"default": ThreadPoolExecutor(20)}, job_defaults=Scheduler.job_defaults
+    )
+    Scheduler._scheduler.start()
+    explorer.PUSH_CHAIN_API_BASE = f"{http_url}/api/v2"
+    CoinGecko.CoinGeckoToken.BASE_URL = f"{http_url}/api/v3"
+    CoinGecko.rate_limiter.rate = CoinGecko.rate_limiter.capacity = 1e9
+    agent.handler = agent.PushChainHandler({"rpc": rpc_url, "chain_id": Scheduler.CHAIN_ID})
+
+def bench_transmit(count: int, key, recipient: str) -> dict:
+    import agent
+    start = time.perf_counter()
+    for _ in range(count):
+        result = agent.transmit(recipient, 0.001, key.key.hex(), key.address)
+        if not result.startswith("Transaction sent"):
+            raise RuntimeError(result)
+    return rate("transmit", count, time.perf_counter() - start)
+
+def bench_bulk_transmit(count: int, key, recipient: str) -> dict:
+    import agent
+    start = time.perf_counter()
+    results = agent.bulk_transmit([[recipient, 0.001]] * count, key.key.hex(), key.address)
+    elapsed = time.perf_counter() - start
+    failed = [r for r in results if r["status"] != "success"]
+    if failed:
+        raise RuntimeError(failed[0])
+    return rate("bulk_transmit", count, elapsed)
+
+def bench_execute_pc_transfer(count: int, key, recipient: str) -> dict:
+    import Scheduler
+    start = time.perf_counter()
+    for _ in range(count):
+        if Scheduler.execute_pc_transfer(recipient, 0.001, key.key.hex(), key.address) is None:
+            raise RuntimeError("execute_pc_transfer failed")
+    return rate("execute_pc_transfer", count, time.perf_counter() - start)
+
+def bench_scheduler_fire(count: int, key, recipient: str) -> dict:
+    """Jobs due immediately, timed from submission until each transfer has been logged"""
+    import Scheduler
+    before = len(Scheduler.execution_log.recent(10**9))
+    scheduler = Scheduler.get_scheduler()
+    due = datetime.now()
+    start = time.perf_counter()
+    for i in range(count):
+        scheduler.add_job(Scheduler.execute_pc_transfer, "date", run_date=due,
+                          args=[recipient, 0.001, key.key.hex(), key.address], id=f"bench_fire_{i}",
+                          misfire_grace_time=None)
+    while len(Scheduler.execution_log.recent(10**9)) - before < count:
+        if time.perf_counter() - start > 300:
+            raise RuntimeError("scheduler did not drain within 300s")
+        time.sleep(0.005)
+    return rate("scheduler_fire", count, time.perf_counter() - start)
+
+def bench_scheduled_batch(count: int, key, recipient: str) -> dict:
+    """One-off scheduled transfers sharing a batch window, run as one batch job"""
+    import Scheduler
+    run_at = datetime.now() + timedelta(hours=1)
+    for _ in range(count):
+        Scheduler.schedule_pc_transfer(recipient, 0.001, run_at, key.key.hex(), key.address)
+    batch_id = f"pc_transfer_batch_{int(Scheduler._batch_slot(run_at).timestamp())}"
+    Scheduler.get_scheduler().remove_job(batch_id)
+    start = time.perf_counter()
+    results = Scheduler.run_transfer_batch(batch_id)
+    elapsed = time.perf_counter() - start
+    sent = sum(1 for r in results if r["status"] == "success")
+    return rate("scheduled_batch", len(results), elapsed, sent=sent)
+
+def bench_explorer(count: int) -> list:
+    import explorer
+    results = []
+    cold, warm = [], []
+    for i in range(count):
+        address = "0x%040x" % i
+        start = time.perf_counter()
+        explorer.get_transactions(address)
+        cold.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        explorer.get_transactions(address)
+        warm.append((time.perf_counter() - start) * 1000)
+    results.append({"name": "explorer_get_transactions_cold", "ops": count, **percentiles(cold)})
+    results.append({"name": "explorer_get_transactions_cached", "ops": count, **percentiles(warm)})
+    return results
+
+def bench_address_book(count: int) -> list:
+    import mymongodb
+    from eth_account import Account
+    entries = [[f"bench{i:06d}", Account.create().address] for i in range(count)]
+    start = time.perf_counter()
+    mymongodb.import_addresses(entries)
+    results = [rate("address_book_import", count, time.perf_counter() - start)]
+
+    start = time.perf_counter()
+    for username, _ in entries:
+        mymongodb.fetch_address_from_book(username)
+    results.append(rate("address_book_lookup", count, time.perf_counter() - start))
+
+    searches = min(count, 500)
+    start = time.perf_counter()
+    for username, _ in entries[:searches]:
+        mymongodb.search_users(username[:-2])
+    results.append(rate("address_book_prefix_search", searches, time.perf_counter() - start))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transfers", type=int, default=200)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--explorer-calls", type=int, default=200)
+    parser.add_argument("--rpc-latency-ms", type=float, default=0.0,
+                        help="artificial delay per JSON-RPC request to mimic a remote node")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    from eth_account import Account
+    chain = ChainStub(latency=args.rpc_latency_ms / 1000)
+    http = HTTPStub()
+    wire(chain.start(), http.start())
+
+    key = Account.create()
+    recipient = Account.create().address
+    report = {
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "settings": vars(args),
+        "results": [
+            bench_transmit(args.transfers, key, recipient),
+            bench_execute_pc_transfer(args.transfers, key, recipient),
+            bench_bulk_transmit(args.transfers, key, recipient),
+            bench_scheduler_fire(args.transfers, key, recipient),
+            bench_scheduled_batch(args.transfers, key, recipient),
+            *bench_explorer(args.explorer_calls),
+            *bench_address_book(args.lookups)
+        ],
+        "rpc_requests": chain.requests,
+        "http_requests": http.requests
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""ERC-20 portfolio lookups: one eth_call per balance vs Multicall3 aggregation.
+
+Deploys synthetic test tokens on the local chain stub, gives a random
+subset of holders a balance in each, then reads every (holder, token)
+balance both ways. Reports wall time and JSON-RPC requests as JSON.
+
+    python benchmarks/bench_portfolio.py --tokens 300 --holders 20 --rpc-latency-ms 30
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stubs import ChainStub
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=300)
+    parser.add_argument("--holders", type=int, default=20)
+    parser.add_argument("--held-fraction", type=float, default=0.05)
+    parser.add_argument("--chunk", type=int, default=500, help="sub-calls per aggregated eth_call")
+    parser.add_argument("--rpc-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    chain = ChainStub(latency=args.rpc_latency_ms / 1000)
+    os.environ["PUSH_RPC_URLS"] = chain.start()
+
+    import Scheduler
+    from eth_utils import to_checksum_address
+    from portfolio import Portfolio, decode_uint, encode_balance_of
+    holders = ["0x%040x" % (0x1000 + i) for i in range(args.holders)]
+    tokens = []
+    for i in range(args.tokens):
+        address = to_checksum_address("0x%040x" % (0xC0FFEE0000 + i))
+        decimals = rng.choice([6, 8, 18])
+        chain.deploy_token(address, decimals, {
+            holder: rng.randrange(1, 10**6) * 10**decimals for holder in holders if rng.random() < args.held_fraction
+        })
+        # Half the tokens carry decimals in the list, the rest are read on chain
+        tokens.append({"address": address, "symbol": f"T{i}", "decimals": str(decimals) if i % 2 else None})
+
+    w3 = Scheduler.get_web3()
+    w3.eth.chain_id  # warm up the pool before timing
+
+    requests = chain.requests
+    start = time.perf_counter()
+    naive_held = 0
+    for holder in holders:
+        for token in tokens:
+            data = "0x" + encode_balance_of(holder).hex()
+            naive_held += decode_uint(bytes(w3.eth.call({"to": token["address"], "data": data}))) > 0
+    naive = {"seconds": round(time.perf_counter() - start, 3), "rpc_requests": chain.requests - requests,
+             "non_zero": naive_held}
+
+    portfolio = Portfolio(Scheduler.get_web3, registry=None, chunk_size=args.chunk)
+    requests = chain.requests
+    start = time.perf_counter()
+    result = portfolio.query(holders, tokens)
+    multicall = {"seconds": round(time.perf_counter() - start, 3), "rpc_requests": chain.requests - requests,
+                 "non_zero": sum(len(items) for items in result.values())}
+
+    print(json.dumps({"settings": vars(args), "balances": args.tokens * args.holders,
+                      "per_call": naive, "multicall": multicall}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""TaskManager throughput benchmark.
+
+Pushes N tasks, reprioritizes and cancels a random tenth of them, peeks
+the top of the queue repeatedly and drains the rest. Reports ops/sec per
+phase as JSON.
+
+    python benchmarks/bench_priority_queue.py --tasks 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PriorityQueue import TaskManager
+
+def timed(name: str, count: int, fn) -> dict:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {"phase": name, "ops": count, "seconds": round(elapsed, 3), "ops_per_sec": round(count / elapsed)}
+
+def run(tasks: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    manager = TaskManager()
+    ids = []
+    touched = tasks // 10
+    peeks = 1000
+
+    def push():
+        for i in range(tasks):
+            ids.append(manager.push(f"task {i}", rng.randint(1, 1000)))
+
+    def reprioritize():
+        for task_id in rng.sample(ids, touched):
+            manager.reprioritize(task_id, rng.randint(1, 1000))
+
+    def cancel():
+        for task_id in rng.sample(ids, touched):
+            manager.cancel(task_id)
+
+    def peek():
+        for page in range(peeks):
+            manager.peek(limit=10, offset=(page % 10) * 10)
+
+    def drain():
+        while manager.pop() is not None:
+            pass
+
+    phases = [timed("push", tasks, push), timed("reprioritize", touched, reprioritize),
+              timed("cancel", touched, cancel), timed("peek_top_100_paged", peeks, peek)]
+    remaining = len(manager)
+    phases.append(timed("pop", remaining, drain))
+    return {"tasks": tasks, "phases": phases}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    print(json.dumps(run(args.tasks, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
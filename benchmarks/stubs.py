@@ -0,0 +1,370 @@
+"""Local stand-ins used by the offline benchmarks.
+
+ChainStub speaks enough Ethereum JSON-RPC (single and batch requests) for
+the agent's send, fee, receipt and lookup paths: every accepted raw
+transaction is mined into the next block the first time the head is read.
+Test ERC-20 tokens added with deploy_token answer balanceOf and decimals,
+directly or through Multicall3's aggregate3 at MULTICALL3_ADDRESS.
+emit_transfer, mine and reorg drive Transfer logs (eth_getLogs), empty
+blocks and chain reorganizations for the indexer.
+HTTPStub answers explorer (/api/v2) and CoinGecko (/api/v3) routes with
+small canned payloads. Both run on 127.0.0.1 on an ephemeral port.
+"""
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from eth_utils import keccak
+
+ZERO_HASH = "0x" + "00" * 32
+MULTICALL3_ADDRESS = "0xca11bde05977b3631167028862be2a173976ca11"
+AGGREGATE3_SELECTOR = keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+BALANCE_OF_SELECTOR = keccak(text="balanceOf(address)")[:4]
+DECIMALS_SELECTOR = keccak(text="decimals()")[:4]
+TRANSFER_TOPIC = "0x" + keccak(text="Transfer(address,address,uint256)").hex()
+BASE_FEE = 7 * 10**9
+
+def _serve(handler_class, state) -> ThreadingHTTPServer:
+    handler = type("Handler", (handler_class,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"{type(state).__name__}-http", daemon=True).start()
+    return server
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    state: Any = None
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; don't let Nagle hold the body back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _reply(self, status: int, body: Any):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client gave up waiting (e.g. a hedged read that lost the race)
+
+    def log_message(self, *args):
+        pass
+
+class _RPCHandler(_JSONHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if isinstance(body, list):
+            self._reply(200, [self.state.handle(request) for request in body])
+        else:
+            self._reply(200, self.state.handle(body))
+
+class ChainStub:
+    """Instamining JSON-RPC chain with no signature or balance checks"""
+
+    def __init__(self, chain_id: int = 42101, latency: float = 0.0):
+        self.chain_id = chain_id
+        self.latency = latency
+        # Bumped by reorg so replacement blocks get new hashes
+        self.fork = 0
+        self.blocks: List[Dict] = [self._block(0, ZERO_HASH, [])]
+        self.mempool: List[str] = []
+        self.receipts: Dict[str, Dict] = {}
+        # Synthetic transactions from emit_transfer: hash -> {"from", "to", "logs": [(token, from, to, value)]}
+        self.emitted: Dict[str, Dict] = {}
+        self.logs: Dict[int, List[Dict]] = {}
+        # Token address (lower case) -> {"decimals": int or None, "balances": {holder (lower case): int}}
+        self.tokens: Dict[str, Dict] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> str:
+        self._server = _serve(_RPCHandler, self)
+        return f"http://127.0.0.1:{self._server.server_port}/"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+
+    def deploy_token(self, address: str, decimals: Optional[int] = 18, balances: Optional[Dict[str, int]] = None):
+        """Add an ERC-20; decimals=None makes decimals() revert"""
+        self.tokens[address.lower()] = {
+            "decimals": decimals,
+            "balances": {holder.lower(): amount for holder, amount in (balances or {}).items()}
+        }
+
+    def _token_call(self, to: str, data: bytes) -> Tuple[bool, bytes]:
+        """(success, return data) of a call into a test token; calls to plain accounts succeed empty"""
+        token = self.tokens.get(to.lower())
+        if token is None:
+            return True, b""
+        if data[:4] == BALANCE_OF_SELECTOR and len(data) >= 36:
+            holder = "0x" + data[16:36].hex()
+            return True, token["balances"].get(holder, 0).to_bytes(32, "big")
+        if data[:4] == DECIMALS_SELECTOR and token["decimals"] is not None:
+            return True, token["decimals"].to_bytes(32, "big")
+        return False, b""
+
+    def _eth_call(self, tx: Dict) -> str:
+        data = bytes.fromhex((tx.get("data") or tx.get("input") or "0x")[2:])
+        if tx["to"].lower() == MULTICALL3_ADDRESS and data[:4] == AGGREGATE3_SELECTOR:
+            from eth_abi import decode, encode
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = []
+            for target, allow_failure, call_data in calls:
+                success, returned = self._token_call(target, call_data)
+                if not success and not allow_failure:
+                    raise ValueError("execution reverted: Multicall3: call failed")
+                results.append((success, returned))
+            return "0x" + encode(["(bool,bytes)[]"], [results]).hex()
+        success, returned = self._token_call(tx["to"], data)
+        if not success:
+            raise ValueError("execution reverted")
+        return "0x" + returned.hex()
+
+    def emit_transfer(self, token: str, sender: str, recipient: str, value: int) -> str:
+        """Queue a transaction carrying one ERC-20 Transfer log; mined with the next block"""
+        with self._lock:
+            tx_hash = "0x" + keccak(f"emit:{len(self.emitted)}:{self.fork}".encode()).hex()
+            self.emitted[tx_hash] = {"from": sender.lower(), "to": token.lower(),
+                                     "logs": [(token.lower(), sender.lower(), recipient.lower(), value)]}
+            self.mempool.append(tx_hash)
+            return tx_hash
+
+    def mine(self, count: int = 1):
+        """Append count blocks, the first one taking the mempool"""
+        with self._lock:
+            for _ in range(count):
+                self._mine(force=True)
+
+    def reorg(self, depth: int):
+        """Replace the last depth blocks with empty ones; their transactions and logs disappear"""
+        with self._lock:
+            for block in self.blocks[-depth:]:
+                for tx_hash in block["transactions"]:
+                    self.receipts.pop(tx_hash, None)
+                self.logs.pop(int(block["number"], 16), None)
+            del self.blocks[-depth:]
+            self.fork += 1
+            for _ in range(depth):
+                self._mine(force=True, transactions=[])
+
+    def _transaction(self, tx_hash: str) -> Optional[Dict]:
+        receipt = self.receipts.get(tx_hash)
+        if receipt is None and tx_hash not in self.mempool:
+            return None
+        emitted = self.emitted.get(tx_hash, {})
+        return {
+            "hash": tx_hash, "from": emitted.get("from", "0x" + "11" * 20), "to": emitted.get("to", "0x" + "22" * 20),
+            "value": "0x0" if emitted else "0x1", "gas": hex(21000), "gasPrice": hex(BASE_FEE), "nonce": "0x0",
+            "input": "0x", "blockNumber": receipt["blockNumber"] if receipt else None,
+            "blockHash": receipt["blockHash"] if receipt else None,
+            "transactionIndex": receipt["transactionIndex"] if receipt else None
+        }
+
+    def _get_logs(self, log_filter: Dict) -> List[Dict]:
+        head = len(self.blocks) - 1
+        def block_number(tag, default):
+            if tag is None or tag in ("latest", "pending", "safe", "finalized"):
+                return default
+            return tag if isinstance(tag, int) else int(tag, 16)
+        start = block_number(log_filter.get("fromBlock"), head)
+        end = min(block_number(log_filter.get("toBlock"), head), head)
+        topics = log_filter.get("topics") or []
+        wanted = topics[0] if topics else None
+        if isinstance(wanted, str):
+            wanted = [wanted]
+        addresses = log_filter.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses = {address.lower() for address in addresses} if addresses else None
+        found = []
+        for number in range(start, end + 1):
+            for log in self.logs.get(number, []):
+                if wanted and log["topics"][0] not in wanted:
+                    continue
+                if addresses and log["address"] not in addresses:
+                    continue
+                found.append(log)
+        return found
+
+    def _block(self, number: int, parent: str, transactions: List[str]) -> Dict:
+        salt = self.fork.to_bytes(4, "big")
+        return {
+            "number": hex(number),
+            "hash": "0x" + keccak(number.to_bytes(8, "big") + bytes.fromhex(parent[2:]) + salt).hex(),
+            "parentHash": parent,
+            "timestamp": hex(1700000000 + number),
+            "gasLimit": hex(30_000_000),
+            "gasUsed": hex(21000 * len(transactions)),
+            "baseFeePerGas": hex(BASE_FEE),
+            "miner": "0x" + "00" * 20,
+            "transactions": transactions
+        }
+
+    def _mine(self, force: bool = False, transactions: Optional[List[str]] = None):
+        # Caller holds the lock
+        if transactions is None:
+            transactions, self.mempool = self.mempool, []
+        if not transactions and not force:
+            return
+        parent = self.blocks[-1]
+        number = len(self.blocks)
+        block = self._block(number, parent["hash"], transactions)
+        block_logs = []
+        for index, tx_hash in enumerate(transactions):
+            logs = []
+            for token, sender, recipient, value in self.emitted.get(tx_hash, {}).get("logs", []):
+                logs.append({
+                    "address": token, "topics": [TRANSFER_TOPIC, "0x" + sender[2:].rjust(64, "0"),
+                                                 "0x" + recipient[2:].rjust(64, "0")],
+                    "data": "0x" + value.to_bytes(32, "big").hex(), "blockNumber": hex(number),
+                    "blockHash": block["hash"], "transactionHash": tx_hash, "transactionIndex": hex(index),
+                    "logIndex": hex(len(block_logs) + len(logs)), "removed": False
+                })
+            block_logs.extend(logs)
+            self.receipts[tx_hash] = {
+                "transactionHash": tx_hash, "transactionIndex": hex(index), "blockNumber": hex(number),
+                "blockHash": block["hash"], "status": "0x1", "gasUsed": hex(21000),
+                "cumulativeGasUsed": hex(21000 * (index + 1)), "logs": logs, "effectiveGasPrice": hex(BASE_FEE)
+            }
+        self.logs[number] = block_logs
+        self.blocks.append(block)
+
+    def call(self, method: str, params: list) -> Any:
+        """Result for one RPC method; override in subclasses to add methods"""
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "net_version":
+            return str(self.chain_id)
+        if method == "eth_blockNumber":
+            self._mine()
+            return hex(len(self.blocks) - 1)
+        if method == "eth_gasPrice":
+            return hex(BASE_FEE + 10**9)
+        if method == "eth_feeHistory":
+            count = int(params[0], 16) if isinstance(params[0], str) else params[0]
+            return {
+                "oldestBlock": hex(max(0, len(self.blocks) - count)),
+                "baseFeePerGas": [hex(BASE_FEE)] * (count + 1),
+                "gasUsedRatio": [0.5] * count,
+                "reward": [[hex(10**9 * (i + 1)) for i in range(len(params[2]))]] * count
+            }
+        if method == "eth_getTransactionCount":
+            return "0x0"
+        if method == "eth_getBalance":
+            return hex(10**21)
+        if method == "eth_sendRawTransaction":
+            tx_hash = "0x" + keccak(bytes.fromhex(params[0][2:])).hex()
+            self.mempool.append(tx_hash)
+            return tx_hash
+        if method == "eth_getBlockByNumber":
+            tag = params[0]
+            number = len(self.blocks) - 1 if tag in ("latest", "pending", "safe", "finalized") else int(tag, 16)
+            if number >= len(self.blocks):
+                return None
+            block = self.blocks[number]
+            if len(params) > 1 and params[1]:
+                block = dict(block, transactions=[self._transaction(tx_hash) for tx_hash in block["transactions"]])
+            return block
+        if method == "eth_getBlockReceipts":
+            number = int(params[0], 16)
+            return [self.receipts[tx_hash] for tx_hash in self.blocks[number]["transactions"]]
+        if method == "eth_call":
+            return self._eth_call(params[0])
+        if method == "eth_getTransactionReceipt":
+            return self.receipts.get(params[0])
+        if method == "eth_getTransactionByHash":
+            return self._transaction(params[0])
+        if method == "eth_getLogs":
+            return self._get_logs(params[0])
+        raise NotImplementedError(method)
+
+    def handle(self, request: Dict) -> Dict:
+        if self.latency:
+            threading.Event().wait(self.latency)
+        with self._lock:
+            self.requests += 1
+            try:
+                result = self.call(request["method"], request.get("params", []))
+            except NotImplementedError:
+                return {"jsonrpc": "2.0", "id": request.get("id"),
+                        "error": {"code": -32601, "message": f"method not found: {request['method']}"}}
+            except ValueError as e:
+                return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": 3, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+class _RESTHandler(_JSONHandler):
+    def do_GET(self):
+        status, body = self.state.route(self.path.split("?")[0])
+        self._reply(status, body)
+
+class HTTPStub:
+    """Canned Blockscout-style explorer and CoinGecko responses"""
+
+    def __init__(self, items_per_page: int = 50):
+        self.items_per_page = items_per_page
+        self.requests = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> str:
+        self._server = _serve(_RESTHandler, self)
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+
+    def _items(self, path: str) -> List[Dict]:
+        return [{"hash": "0x" + keccak(f"{path}/{i}".encode()).hex(), "value": str(i * 10**18),
+                 "from": {"hash": "0x" + "11" * 20}, "to": {"hash": "0x" + "22" * 20}}
+                for i in range(self.items_per_page)]
+
+    def route(self, path: str):
+        self.requests += 1
+        if path.startswith("/api/v3/coins/"):
+            if path.endswith("/tickers"):
+                return 200, {"tickers": [{"base": "PC", "target": "USDT", "market": {"name": "stub"},
+                                          "last": 1.0, "volume": 1000, "trust_score": "green"}]}
+            if "/market_chart" in path:
+                points = [[1700000000000 + i * 3600000, 1.0 + i / 1000] for i in range(24)]
+                return 200, {"prices": points, "market_caps": points, "total_volumes": points}
+            return 200, {"id": path.split("/")[4], "symbol": "push", "name": "Push Protocol",
+                         "market_data": {"current_price": {"usd": 1.0}}, "description": {"en": ""}}
+        if path.startswith("/api/v2/"):
+            if path.rstrip("/").split("/")[-2] == "blocks":
+                return 200, {"height": int(path.rstrip("/").split("/")[-1]), "timestamp": "2023-11-14T22:13:20Z"}
+            return 200, {"items": self._items(path), "next_page_params": None}
+        return 404, {"message": "not found"}
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+
+class _Reply:
+    def __init__(self, text: str, usage: _Usage):
+        self.text = text
+        self.usage_metadata = usage
+
+class StubModel:
+    """Stand-in for genai.GenerativeModel with fixed latency and word-count token usage"""
+
+    def __init__(self, latency: float = 0.5, answer_words: int = 120):
+        self.latency = latency
+        self.answer_words = answer_words
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str) -> _Reply:
+        with self._lock:
+            self.calls += 1
+        threading.Event().wait(self.latency)
+        text = " ".join(["push"] * self.answer_words)
+        return _Reply(text, _Usage(len(prompt.split()), self.answer_words))
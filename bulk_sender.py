@@ -0,0 +1,140 @@
+import multiprocessing
+import os
+import threading
+import http_client
+import rpc_pool
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Sequence, Tuple
+from eth_account import Account
+from web3 import Web3
+from nonce_manager import nonce_manager, is_already_known, transaction_hash
+from fee_oracle import TRANSFER_GAS, get_fee_oracle
+from receipt_tracker import get_receipt_tracker
+
+# Tuning for large payrolls
+SIGN_CHUNK_SIZE = 100       # transactions signed per worker task
+RPC_BATCH_SIZE = 100        # eth_sendRawTransaction calls per JSON-RPC batch
+INLINE_SIGN_LIMIT = 50      # below this, signing in-process beats pool startup
+
+_sign_pool = None
+_sign_pool_lock = threading.Lock()
+
+def _get_sign_pool() -> ProcessPoolExecutor:
+    global _sign_pool
+    with _sign_pool_lock:
+        if _sign_pool is None:
+            # Forking a process that already runs background threads can copy their held locks into workers
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _sign_pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=context)
+    return _sign_pool
+
+def _sign_chunk(transactions: List[Dict], private_key: str) -> List[str]:
+    """Sign a chunk of transactions and return raw hex (runs in a worker process)"""
+    return [Account.sign_transaction(tx, private_key).rawTransaction.hex() for tx in transactions]
+
+def sign_transactions(transactions: List[Dict], private_key: str) -> List[str]:
+    """Sign transactions in parallel across a process pool, preserving order"""
+    if len(transactions) <= INLINE_SIGN_LIMIT:
+        return _sign_chunk(transactions, private_key)
+
+    chunks = [transactions[i:i + SIGN_CHUNK_SIZE] for i in range(0, len(transactions), SIGN_CHUNK_SIZE)]
+    pool = _get_sign_pool()
+    signed = []
+    for raw_chunk in pool.map(_sign_chunk, chunks, [private_key] * len(chunks)):
+        signed.extend(raw_chunk)
+    return signed
+
+def send_raw_batch(rpc_url: str, raw_transactions: List[str]) -> List[Dict]:
+    """Broadcast signed transactions as one JSON-RPC batch request"""
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": "eth_sendRawTransaction", "params": [raw]}
+        for i, raw in enumerate(raw_transactions)
+    ]
+    # Fails over to the pool's other endpoints if this one is unreachable
+    response = rpc_pool.get_pool_for(rpc_url).post(payload, timeout=(http_client.CONNECT_TIMEOUT, 30), prefer=rpc_url)
+    response.raise_for_status()
+    replies = response.json()
+    if not isinstance(replies, list):
+        raise ValueError(f"RPC endpoint rejected batch: {replies}")
+
+    by_id = {reply.get("id"): reply for reply in replies}
+    return [by_id.get(i, {"error": {"message": "missing reply"}}) for i in range(len(raw_transactions))]
+
+def send_bulk(w3: Web3, rpc_url: str, chain_id: int, transfers: Sequence[Tuple[str, float]],
+              private_key: str, from_address: str, urgency: str = "normal") -> List[Dict]:
+    """Send many PC transfers from one wallet and return a result per recipient"""
+    results = []
+    valid = []
+    for to_address, amount in transfers:
+        result = {"to": to_address, "amount": amount}
+        results.append(result)
+        if not Web3.is_address(to_address):
+            result.update(status="failed", error=f"Invalid address format: {to_address}")
+            continue
+        result["to"] = Web3.to_checksum_address(to_address)
+        valid.append(result)
+
+    if not valid:
+        return results
+
+    # One fee quote for the whole payroll so no transaction stalls behind a cheaper one
+    fees = get_fee_oracle().fee_fields(urgency)
+
+    # One contiguous nonce block for the whole payroll
+    nonces = nonce_manager.allocate_many(w3, from_address, len(valid))
+    transactions = []
+    for result, nonce in zip(valid, nonces):
+        result["nonce"] = nonce
+        transactions.append({
+            'to': result["to"],
+            'value': w3.to_wei(result["amount"], 'ether'),
+            'gas': TRANSFER_GAS,
+            **fees,
+            'nonce': nonce,
+            'chainId': chain_id
+        })
+
+    try:
+        raw_transactions = sign_transactions(transactions, private_key)
+    except Exception as e:
+        nonce_manager.resync(from_address)
+        for result in valid:
+            result.update(status="failed", error=f"Signing failed: {str(e)}")
+        return results
+
+    # Send chunks in nonce order; after a failure later nonces would sit behind a gap
+    failed = False
+    for start in range(0, len(valid), RPC_BATCH_SIZE):
+        chunk = valid[start:start + RPC_BATCH_SIZE]
+        if failed:
+            for result in chunk:
+                result.update(status="skipped", error="Not sent: an earlier transfer in this batch failed")
+            continue
+
+        chunk_raw = raw_transactions[start:start + RPC_BATCH_SIZE]
+        try:
+            replies = send_raw_batch(rpc_url, chunk_raw)
+        except Exception as e:
+            # The node may have accepted some or all of the chunk before the connection broke:
+            # never report these as failed (a retry would pay twice), let receipts decide
+            for result, raw in zip(chunk, chunk_raw):
+                tx_hash = transaction_hash(raw).hex()
+                result.update(status="unknown", tx_hash=tx_hash,
+                              error=f"Outcome unknown, tracking receipt: {str(e)}")
+                get_receipt_tracker().track(tx_hash, raw)
+            failed = True
+            continue
+
+        for result, reply, raw in zip(chunk, replies, chunk_raw):
+            if "result" in reply or is_already_known(reply.get("error")):
+                tx_hash = reply.get("result") or transaction_hash(raw).hex()
+                result.update(status="success", tx_hash=tx_hash)
+                get_receipt_tracker().track(tx_hash, raw)
+            else:
+                result.update(status="failed", error=reply.get("error", {}).get("message", "unknown error"))
+                failed = True
+
+    if failed:
+        nonce_manager.resync(from_address)
+    return results
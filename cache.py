@@ -0,0 +1,126 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+MISS = object()
+
+class ResponseCache:
+    """Thread-safe LRU cache of JSON responses with per-entry TTLs and a byte budget"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disk_path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at, size)
+        self._lock = threading.Lock()
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+            self._db.commit()
+
+    def _store(self, key: str, value: Any, expires_at: Optional[float], size: int):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def _load_from_disk(self, key: str, now: float):
+        row = self._db.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return MISS
+        value = json.loads(row[0])
+        self._store(key, value, row[1], len(row[0]))
+        return value
+
+    def get(self, key: str) -> Any:
+        """Return the cached value for key, or MISS if absent or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            value = self._load_from_disk(key, now) if self._db is not None else MISS
+            if value is MISS:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def lookup(self, key: str) -> Tuple[Any, bool]:
+        """Return (value, fresh), including expired entries not yet evicted, or (MISS, False)"""
+        value = self.get(key)
+        if value is not MISS:
+            return value, True
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS, False
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return entry[0], False
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Cache value for ttl seconds, or indefinitely when ttl is None"""
+        expires_at = None if ttl is None else time.time() + ttl
+        encoded = json.dumps(value)
+        with self._lock:
+            self._store(key, value, expires_at, len(encoded))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, encoded, expires_at)
+                )
+                self._db.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
+
+def make_key(url: str, params: Optional[Dict] = None) -> str:
+    """Stable cache key for a GET request"""
+    if not params:
+        return url
+    return url + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
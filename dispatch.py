@@ -0,0 +1,109 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional, Tuple
+from ratelimit import TokenBucket
+
+# Send requests per second across every wallet, and per RPC endpoint (a JSON-RPC batch is one request)
+GLOBAL_RATE = float(os.getenv("DISPATCH_RATE", "50"))
+RPC_RATE = float(os.getenv("DISPATCH_RPC_RATE", "25"))
+MAX_LANES = int(os.getenv("DISPATCH_MAX_LANES", "8"))
+
+# What to do with runs missed while the process was down:
+#   coalesce - run each job once to catch up (default)
+#   all      - replay every missed run, drained through the lanes at the rate limits
+#   skip     - drop runs more than DISPATCH_MISFIRE_GRACE seconds late
+CATCHUP_POLICY = os.getenv("SCHEDULER_CATCHUP", "coalesce")
+MISFIRE_GRACE_SECONDS = int(os.getenv("DISPATCH_MISFIRE_GRACE", "60"))
+
+def catchup_job_defaults(policy: str = CATCHUP_POLICY) -> Dict:
+    """APScheduler job defaults implementing a catch-up policy"""
+    if policy == "coalesce":
+        return {"coalesce": True, "misfire_grace_time": None, "max_instances": 3}
+    if policy == "all":
+        return {"coalesce": False, "misfire_grace_time": None, "max_instances": 3}
+    if policy == "skip":
+        return {"coalesce": True, "misfire_grace_time": MISFIRE_GRACE_SECONDS, "max_instances": 3}
+    raise ValueError(f"Unknown catch-up policy '{policy}'. Use: coalesce, all, skip")
+
+def _acquire(bucket: TokenBucket, cost: float):
+    # Large batches take the bucket in capacity-sized bites rather than waiting forever
+    while cost > 0:
+        take = min(cost, bucket.capacity)
+        bucket.acquire(take)
+        cost -= take
+
+class _Lane:
+    def __init__(self):
+        self.queue: Deque[Tuple[Future, Callable, tuple, dict, float, Optional[str]]] = deque()
+        self.running = False
+
+class Dispatcher:
+    """One ordered lane per sender; lanes run in parallel and share global and per-RPC rate limits"""
+
+    def __init__(self, max_lanes: int = MAX_LANES, global_rate: float = GLOBAL_RATE, rpc_rate: float = RPC_RATE):
+        self.rpc_rate = rpc_rate
+        self.global_limit = TokenBucket(rate=global_rate, capacity=max(1.0, global_rate))
+        self._rpc_limits: Dict[str, TokenBucket] = {}
+        self._lanes: Dict[str, _Lane] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_lanes, thread_name_prefix="dispatch-lane")
+
+    def _rpc_limit(self, rpc_url: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._rpc_limits.get(rpc_url)
+            if bucket is None:
+                bucket = self._rpc_limits[rpc_url] = TokenBucket(rate=self.rpc_rate, capacity=max(1.0, self.rpc_rate))
+            return bucket
+
+    def submit(self, sender: str, fn: Callable, *args, cost: float = 1, rpc_url: Optional[str] = None,
+               **kwargs) -> Future:
+        """Queue fn behind earlier work from the same sender; cost is the number of send requests it makes"""
+        future: Future = Future()
+        key = sender.lower()
+        with self._lock:
+            lane = self._lanes.setdefault(key, _Lane())
+            lane.queue.append((future, fn, args, kwargs, cost, rpc_url))
+            start = not lane.running
+            lane.running = True
+        if start:
+            self._pool.submit(self._drain, key)
+        return future
+
+    def _drain(self, key: str):
+        """Run the next item of one lane, then requeue the lane behind the others"""
+        with self._lock:
+            lane = self._lanes[key]
+            future, fn, args, kwargs, cost, rpc_url = lane.queue.popleft()
+        if future.set_running_or_notify_cancel():
+            try:
+                _acquire(self.global_limit, cost)
+                if rpc_url:
+                    _acquire(self._rpc_limit(rpc_url), cost)
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+        with self._lock:
+            if not lane.queue:
+                lane.running = False
+                del self._lanes[key]
+                return
+        # Round-robin: a long payroll from one wallet cannot starve the other lanes
+        self._pool.submit(self._drain, key)
+
+    def backlog(self) -> Dict[str, int]:
+        """Queued (not yet started) items per sender"""
+        with self._lock:
+            return {key: len(lane.queue) for key, lane in self._lanes.items()}
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher() -> Dispatcher:
+    """Shared dispatcher used by every scheduled transfer"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = Dispatcher()
+    return _dispatcher
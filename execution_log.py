@@ -0,0 +1,164 @@
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Union
+
+TimeBound = Optional[Union[str, datetime]]
+
+def _as_datetime(value: TimeBound) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+class ExecutionLog:
+    """Fixed-size ring of recent transfers with write-behind bulk persistence to MongoDB"""
+
+    def __init__(self, get_collection: Callable, capacity: int = 1000, flush_interval: float = 2.0,
+                 flush_size: int = 500, max_pending: int = 50000):
+        self._get_collection = get_collection
+        self._recent = deque(maxlen=capacity)
+        # Bounded so a MongoDB outage cannot grow memory without limit
+        self._pending = deque(maxlen=max_pending)
+        self._pending_updates = deque(maxlen=max_pending)
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._lock = threading.Lock()
+        # Serializes flushes so a status update is never written before its insert
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher = None
+        self._collection = None
+
+    def _collection_with_indexes(self):
+        if self._collection is None:
+            collection = self._get_collection()
+            collection.create_index([("from", 1), ("executed_at", -1)])
+            collection.create_index([("to", 1), ("executed_at", -1)])
+            collection.create_index([("status", 1), ("executed_at", -1)])
+            collection.create_index([("tx_hash", 1)])
+            collection.create_index([("executed_at", -1)])
+            self._collection = collection
+        return self._collection
+
+    def _start_flusher(self):
+        self._flusher = threading.Thread(target=self._run_flusher, name="execution-log-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _run_flusher(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Execution log flush failed: {str(e)}")
+
+    def append(self, entry: Dict):
+        with self._lock:
+            self._recent.append(entry)
+            self._pending.append(entry)
+            if self._flusher is None:
+                self._start_flusher()
+            if len(self._pending) >= self.flush_size:
+                self._wake.set()
+
+    def update_status(self, tx_hash: str, status: str, **fields):
+        """Set the status (and any extra fields) of the entry for a transaction hash"""
+        changes = dict(fields, status=status)
+        with self._lock:
+            for entry in self._recent:
+                if entry.get("tx_hash") == tx_hash:
+                    entry.update(changes)
+            # Entries still waiting to be inserted pick the change up directly
+            unflushed = False
+            for entry in self._pending:
+                if entry.get("tx_hash") == tx_hash:
+                    entry.update(changes)
+                    unflushed = True
+            if not unflushed:
+                self._pending_updates.append((tx_hash, changes))
+            if self._flusher is None:
+                self._start_flusher()
+
+    def flush(self) -> int:
+        """Write buffered entries to MongoDB in one bulk insert, then any status updates"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+                self._pending.clear()
+                updates = list(self._pending_updates)
+                self._pending_updates.clear()
+            if batch:
+                documents = [dict(entry, executed_at=_as_datetime(entry["executed_at"])) for entry in batch]
+                try:
+                    self._collection_with_indexes().insert_many(documents, ordered=False)
+                except Exception:
+                    with self._lock:
+                        self._pending.extendleft(reversed(batch))
+                        self._pending_updates.extendleft(reversed(updates))
+                    raise
+            if updates:
+                from pymongo import UpdateMany
+                try:
+                    self._collection_with_indexes().bulk_write(
+                        [UpdateMany({"tx_hash": tx_hash}, {"$set": changes}) for tx_hash, changes in updates],
+                        ordered=True
+                    )
+                except Exception:
+                    with self._lock:
+                        self._pending_updates.extendleft(reversed(updates))
+                    raise
+            return len(batch)
+
+    def recent(self, limit: int = 50) -> List[Dict]:
+        """Newest in-memory entries, most recent first"""
+        with self._lock:
+            return list(reversed(self._recent))[:limit]
+
+    def query(self, sender: Optional[str] = None, recipient: Optional[str] = None,
+              status: Optional[str] = None, since: TimeBound = None, until: TimeBound = None,
+              limit: int = 50, cursor: Optional[str] = None) -> Dict:
+        """Paginated history, newest first; pass the returned next_cursor to get the next page"""
+        from bson import ObjectId
+        self.flush()
+
+        filters: Dict = {}
+        if sender:
+            filters["from"] = sender
+        if recipient:
+            filters["to"] = recipient
+        if status:
+            filters["status"] = status
+        if since or until:
+            filters["executed_at"] = {}
+            if since:
+                filters["executed_at"]["$gte"] = _as_datetime(since)
+            if until:
+                filters["executed_at"]["$lt"] = _as_datetime(until)
+        if cursor:
+            # Cursor is "<executed_at>|<_id>" of the last row returned
+            executed_at, last_id = cursor.split("|")
+            executed_at, last_id = datetime.fromisoformat(executed_at), ObjectId(last_id)
+            filters["$or"] = [
+                {"executed_at": {"$lt": executed_at}},
+                {"executed_at": executed_at, "_id": {"$lt": last_id}}
+            ]
+
+        documents = list(
+            self._collection_with_indexes()
+            .find(filters)
+            .sort([("executed_at", -1), ("_id", -1)])
+            .limit(limit)
+        )
+        next_cursor = None
+        if len(documents) == limit:
+            last = documents[-1]
+            next_cursor = f"{last['executed_at'].isoformat()}|{last['_id']}"
+        items = []
+        for document in documents:
+            document["executed_at"] = document["executed_at"].isoformat()
+            document.pop("_id")
+            items.append(document)
+        return {"items": items, "next_cursor": next_cursor}
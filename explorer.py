@@ -1,22 +1,96 @@
-import requests
-from typing import List, Dict, Optional
-from datetime import datetime
+import http_client
+import metrics
+from cache import ResponseCache, MISS, make_key
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple, Any, Iterator, AsyncIterator
+from datetime import datetime, timezone
+import asyncio
 import json
+import os
+import re
 
 PUSH_CHAIN_API_BASE = "https://donut.push.network/api/v2"
 
+# Per-endpoint TTLs in seconds; None caches content-addressed data indefinitely
+CACHE_TTLS = {
+    "address_transactions": 15,
+    "block": None,
+    "latest_blocks": 5,
+    "token_transfers": 15,
+    "token_holders": 60,
+    "address": 15,
+    "chart": 300,
+    "search": 30,
+    "search_tx": None
+}
+# Answer history queries from the local chain index (indexer.py) when it is running
+USE_LOCAL_INDEX = os.getenv("USE_LOCAL_INDEX", "0") == "1"
+
+# Blocks younger than this are only cached briefly in case they are still settling
+BLOCK_FINALITY_SECONDS = 60
+TX_HASH_PATTERN = re.compile(r"^0x[0-9a-fA-F]{64}$")
+
+response_cache = ResponseCache(
+    max_bytes=int(os.getenv("EXPLORER_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    disk_path=os.getenv("EXPLORER_CACHE_PATH")
+)
+
+def _cached_get(url: str, params: Optional[Dict], endpoint: str, ttl_for=None) -> Tuple[int, Any]:
+    """Fetch JSON through the response cache, returning (status_code, data)"""
+    key = make_key(url, params)
+    data = response_cache.get(key)
+    if data is not MISS:
+        return 200, data
+    
+    response = http_client.get(url, params=params)
+    if response.status_code != 200:
+        return response.status_code, None
+    
+    data = response.json()
+    ttl = ttl_for(data) if ttl_for else CACHE_TTLS[endpoint]
+    response_cache.set(key, data, ttl)
+    return 200, data
+
+def _block_ttl(block: Dict) -> Optional[float]:
+    try:
+        timestamp = datetime.fromisoformat(block["timestamp"].replace("Z", "+00:00"))
+        age = (datetime.now(timezone.utc) - timestamp).total_seconds()
+    except (KeyError, AttributeError, ValueError):
+        return CACHE_TTLS["latest_blocks"]
+    return CACHE_TTLS["block"] if age > BLOCK_FINALITY_SECONDS else CACHE_TTLS["latest_blocks"]
+
+def _from_local_index(query: str, *args) -> Optional[List[Dict]]:
+    """Run a query against the local index, or None to fall back to the remote API"""
+    if not USE_LOCAL_INDEX:
+        return None
+    try:
+        from indexer import get_indexer
+        indexer = get_indexer()
+        if not indexer.is_complete():
+            return None
+        return getattr(indexer, query)(*args)
+    except Exception:
+        return None
+
+def get_cache_stats() -> Dict:
+    """Hit/miss counters and size of the explorer response cache"""
+    return response_cache.stats()
+
 def get_transactions(address: str, limit: int = 10) -> List[Dict]:
     """Get real transactions for an address on Push Chain"""
     try:
+        local = _from_local_index("transactions_for", address, limit)
+        if local is not None:
+            return local
+        
         url = f"{PUSH_CHAIN_API_BASE}/addresses/{address}/transactions"
         params = {"limit": limit}
-        response = requests.get(url, params=params)
+        status, data = _cached_get(url, params, "address_transactions")
         
-        if response.status_code == 200:
-            data = response.json()
+        if status == 200:
             return data.get("items", [])
         else:
-            return [{"error": f"API error: {response.status_code}"}]
+            return [{"error": f"API error: {status}"}]
     except Exception as e:
         return [{"error": str(e)}]
 
@@ -25,15 +99,15 @@ def get_block_data(block_number: Optional[int] = None) -> Dict:
     try:
         if block_number:
             url = f"{PUSH_CHAIN_API_BASE}/blocks/{block_number}"
+            status, data = _cached_get(url, None, "block", ttl_for=_block_ttl)
         else:
             url = f"{PUSH_CHAIN_API_BASE}/blocks"
-            
-        response = requests.get(url)
+            status, data = _cached_get(url, None, "latest_blocks")
         
-        if response.status_code == 200:
-            return response.json()
+        if status == 200:
+            return data
         else:
-            return {"error": f"API error: {response.status_code}"}
+            return {"error": f"API error: {status}"}
     except Exception as e:
         return {"error": str(e)}
 
@@ -42,43 +116,48 @@ def get_latest_blocks(limit: int = 10) -> List[Dict]:
     try:
         url = f"{PUSH_CHAIN_API_BASE}/blocks"
         params = {"limit": limit}
-        response = requests.get(url, params=params)
+        status, data = _cached_get(url, params, "latest_blocks")
         
-        if response.status_code == 200:
-            data = response.json()
+        if status == 200:
             return data.get("items", [])
         else:
-            return [{"error": f"API error: {response.status_code}"}]
+            return [{"error": f"API error: {status}"}]
     except Exception as e:
         return [{"error": str(e)}]
 
 def get_token_transfers(token_address: str, limit: int = 20) -> List[Dict]:
     """Get token transfer events"""
     try:
+        local = _from_local_index("token_transfers_for", token_address, limit)
+        if local is not None:
+            return local
+        
         url = f"{PUSH_CHAIN_API_BASE}/tokens/{token_address}/transfers"
         params = {"limit": limit}
-        response = requests.get(url, params=params)
+        status, data = _cached_get(url, params, "token_transfers")
         
-        if response.status_code == 200:
-            data = response.json()
+        if status == 200:
             return data.get("items", [])
         else:
-            return [{"error": f"API error: {response.status_code}"}]
+            return [{"error": f"API error: {status}"}]
     except Exception as e:
         return [{"error": str(e)}]
 
 def get_token_holders(token_address: str, limit: int = 50) -> List[Dict]:
     """Get token holders for a specific token"""
     try:
+        local = _from_local_index("token_holders_for", token_address, limit)
+        if local is not None:
+            return local
+        
         url = f"{PUSH_CHAIN_API_BASE}/tokens/{token_address}/holders"
         params = {"limit": limit}
-        response = requests.get(url, params=params)
+        status, data = _cached_get(url, params, "token_holders")
         
-        if response.status_code == 200:
-            data = response.json()
+        if status == 200:
             return data.get("items", [])
         else:
-            return [{"error": f"API error: {response.status_code}"}]
+            return [{"error": f"API error: {status}"}]
     except Exception as e:
         return [{"error": str(e)}]
 
@@ -86,12 +165,12 @@ def get_address_balance(address: str) -> Dict:
     """Get PC balance and token balances for address"""
     try:
         url = f"{PUSH_CHAIN_API_BASE}/addresses/{address}"
-        response = requests.get(url)
+        status, data = _cached_get(url, None, "address")
         
-        if response.status_code == 200:
-            return response.json()
+        if status == 200:
+            return data
         else:
-            return {"error": f"API error: {response.status_code}"}
+            return {"error": f"API error: {status}"}
     except Exception as e:
         return {"error": str(e)}
 
@@ -101,12 +180,12 @@ def get_market_chart_data(days: int = 7) -> Dict:
         # This would integrate with Push Chain's market data API
         url = f"{PUSH_CHAIN_API_BASE}/stats/charts/transactions"
         params = {"period": f"{days}d"}
-        response = requests.get(url, params=params)
+        status, data = _cached_get(url, params, "chart")
         
-        if response.status_code == 200:
-            return response.json()
+        if status == 200:
+            return data
         else:
-            return {"error": f"API error: {response.status_code}"}
+            return {"error": f"API error: {status}"}
     except Exception as e:
         return {"error": str(e)}
 
@@ -115,11 +194,146 @@ def search_transactions(query: str) -> List[Dict]:
     try:
         url = f"{PUSH_CHAIN_API_BASE}/search"
         params = {"q": query}
-        response = requests.get(url, params=params)
+        if TX_HASH_PATTERN.match(query.strip()):
+            # A found transaction hash never changes; keep retrying ones not yet indexed
+            ttl_for = lambda data: CACHE_TTLS["search_tx"] if data.get("items") else CACHE_TTLS["search"]
+            status, data = _cached_get(url, params, "search_tx", ttl_for=ttl_for)
+        else:
+            status, data = _cached_get(url, params, "search")
         
-        if response.status_code == 200:
-            return response.json().get("items", [])
+        if status == 200:
+            return data.get("items", [])
         else:
-            return [{"error": f"API error: {response.status_code}"}]
+            return [{"error": f"API error: {status}"}]
     except Exception as e:
-        return [{"error": str(e)}]
\ No newline at end of file
+        return [{"error": str(e)}]
+
+# Streaming pagination over Blockscout's next_page_params cursors
+
+class ExplorerAPIError(Exception):
+    pass
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="explorer-prefetch")
+
+def _fetch_page(url: str, params: Dict) -> Tuple[List[Dict], Optional[Dict]]:
+    response = http_client.get(url, params=params)
+    if response.status_code != 200:
+        raise ExplorerAPIError(f"API error: {response.status_code}")
+    data = response.json()
+    return data.get("items", []), data.get("next_page_params")
+
+class Paginator:
+    """Lazily walks every page of a list endpoint, fetching the next page while the current one is consumed.
+
+    Once a page has been consumed, `cursor` holds the params of the next one,
+    so a scan can be resumed later with Paginator(path, cursor=saved). After
+    the last page it keeps that page's cursor and `exhausted` turns True, so
+    resuming re-reads the tail instead of starting over from page one.
+    """
+
+    def __init__(self, path: str, params: Optional[Dict] = None, cursor: Optional[Dict] = None,
+                 prefetch: bool = True):
+        self.url = f"{PUSH_CHAIN_API_BASE}{path}"
+        self.params = dict(params or {})
+        self.cursor = cursor
+        self.exhausted = False
+        self.prefetch = prefetch
+        self.pages_fetched = 0
+
+    def pages(self) -> Iterator[List[Dict]]:
+        pending = metrics.submit_in_context(_prefetch_pool, _fetch_page, self.url,
+                                            {**self.params, **(self.cursor or {})})
+        try:
+            while pending is not None:
+                items, next_params = pending.result()
+                self.pages_fetched += 1
+                next_request = {**self.params, **next_params} if next_params else None
+                pending = None
+                if next_request and self.prefetch:
+                    pending = metrics.submit_in_context(_prefetch_pool, _fetch_page, self.url, next_request)
+                yield items
+                if next_params:
+                    self.cursor = next_params
+                else:
+                    self.exhausted = True
+                if next_request and pending is None:
+                    pending = metrics.submit_in_context(_prefetch_pool, _fetch_page, self.url, next_request)
+        finally:
+            # Early termination: drop a prefetch that has not started yet
+            if pending is not None:
+                pending.cancel()
+
+    def __iter__(self) -> Iterator[Dict]:
+        for items in self.pages():
+            yield from items
+
+async def aiter_pages(path: str, params: Optional[Dict] = None,
+                      cursor: Optional[Dict] = None) -> AsyncIterator[Tuple[List[Dict], Optional[Dict]]]:
+    """Async variant yielding (items, next_cursor) with the next page already in flight"""
+    url = f"{PUSH_CHAIN_API_BASE}{path}"
+    params = dict(params or {})
+
+    async def fetch(request_params):
+        response = await http_client.async_get(url, params=request_params)
+        if response.status_code != 200:
+            raise ExplorerAPIError(f"API error: {response.status_code}")
+        data = response.json()
+        return data.get("items", []), data.get("next_page_params")
+
+    pending = asyncio.ensure_future(fetch({**params, **(cursor or {})}))
+    try:
+        while pending is not None:
+            items, next_params = await pending
+            pending = asyncio.ensure_future(fetch({**params, **next_params})) if next_params else None
+            yield items, next_params
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+def iter_transactions(address: str, cursor: Optional[Dict] = None) -> Paginator:
+    """Every transaction for an address, newest first, as a lazy resumable iterator"""
+    return Paginator(f"/addresses/{address}/transactions", cursor=cursor)
+
+def iter_token_transfers(token_address: str, cursor: Optional[Dict] = None) -> Paginator:
+    """Every transfer of a token as a lazy resumable iterator"""
+    return Paginator(f"/tokens/{token_address}/transfers", cursor=cursor)
+
+def iter_token_holders(token_address: str, cursor: Optional[Dict] = None) -> Paginator:
+    """Every holder of a token as a lazy resumable iterator"""
+    return Paginator(f"/tokens/{token_address}/holders", cursor=cursor)
+
+class AsyncPaginator:
+    """Item-level async iteration over aiter_pages with the same cursor and exhausted bookkeeping as Paginator"""
+
+    def __init__(self, path: str, params: Optional[Dict] = None, cursor: Optional[Dict] = None):
+        self.path = path
+        self.params = dict(params or {})
+        self.cursor = cursor
+        self.exhausted = False
+        self.pages_fetched = 0
+
+    async def pages(self) -> AsyncIterator[List[Dict]]:
+        async for items, next_params in aiter_pages(self.path, self.params, self.cursor):
+            self.pages_fetched += 1
+            yield items
+            if next_params:
+                self.cursor = next_params
+            else:
+                self.exhausted = True
+
+    async def _items(self) -> AsyncIterator[Dict]:
+        async for items in self.pages():
+            for item in items:
+                yield item
+
+    def __aiter__(self) -> AsyncIterator[Dict]:
+        return self._items()
+
+def aiter_transactions(address: str, cursor: Optional[Dict] = None) -> AsyncPaginator:
+    return AsyncPaginator(f"/addresses/{address}/transactions", cursor=cursor)
+
+def aiter_token_transfers(token_address: str, cursor: Optional[Dict] = None) -> AsyncPaginator:
+    return AsyncPaginator(f"/tokens/{token_address}/transfers", cursor=cursor)
+
+def aiter_token_holders(token_address: str, cursor: Optional[Dict] = None) -> AsyncPaginator:
+    return AsyncPaginator(f"/tokens/{token_address}/holders", cursor=cursor)
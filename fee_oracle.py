@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# A plain PC transfer to an externally owned account always costs exactly this much gas
+TRANSFER_GAS = 21000
+FALLBACK_GAS_PRICE = 20 * 10**9  # 20 gwei, used until the first refresh lands
+
+# Reward percentiles requested from eth_feeHistory, and what each urgency level uses
+URGENCY_PERCENTILES = {"low": 10, "normal": 50, "high": 90}
+LEGACY_MULTIPLIERS = {"low": 0.9, "normal": 1.0, "high": 1.25}
+
+class FeeOracle:
+    """Keeps a fresh fee estimate in the background so senders never wait on a fee RPC"""
+
+    def __init__(self, get_w3: Callable, refresh_interval: float = 6.0, history_blocks: int = 20):
+        self._get_w3 = get_w3
+        self.refresh_interval = refresh_interval
+        self.history_blocks = history_blocks
+        self._estimate: Optional[Dict] = None
+        self._updated_at = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self):
+        """Pull fee history (or the legacy gas price) and replace the cached estimate"""
+        w3 = self._get_w3()
+        percentiles = sorted(URGENCY_PERCENTILES.values())
+        try:
+            history = w3.eth.fee_history(self.history_blocks, "latest", percentiles)
+            base_fee = history["baseFeePerGas"][-1]  # already the projection for the next block
+            rewards = [block for block in history["reward"] if block]
+            tips = {}
+            for urgency, percentile in URGENCY_PERCENTILES.items():
+                column = sorted(block[percentiles.index(percentile)] for block in rewards)
+                tips[urgency] = column[len(column) // 2] if column else 0
+            estimate = {"eip1559": True, "base_fee": base_fee, "tips": tips}
+        except Exception:
+            # Node without EIP-1559 fee history
+            estimate = {"eip1559": False, "gas_price": w3.eth.gas_price}
+        with self._lock:
+            self._estimate = estimate
+            self._updated_at = time.monotonic()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"❌ Fee oracle refresh failed: {str(e)}")
+            time.sleep(self.refresh_interval)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="fee-oracle", daemon=True)
+                self._thread.start()
+
+    def fee_fields(self, urgency: str = "normal") -> Dict:
+        """Transaction fee fields for the given urgency, served from cache"""
+        if urgency not in URGENCY_PERCENTILES:
+            raise ValueError(f"Unknown urgency '{urgency}'. Use: {', '.join(URGENCY_PERCENTILES)}")
+        self.start()
+        with self._lock:
+            estimate = self._estimate
+
+        if estimate is None:
+            return {"gasPrice": int(FALLBACK_GAS_PRICE * LEGACY_MULTIPLIERS[urgency])}
+        if not estimate["eip1559"]:
+            return {"gasPrice": int(estimate["gas_price"] * LEGACY_MULTIPLIERS[urgency])}
+
+        tip = estimate["tips"][urgency]
+        # Headroom for the base fee doubling before inclusion; unused max fee is refunded
+        return {
+            "type": 2,
+            "maxPriorityFeePerGas": tip,
+            "maxFeePerGas": 2 * estimate["base_fee"] + tip
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "estimate": self._estimate,
+                "age_seconds": round(time.monotonic() - self._updated_at, 1) if self._estimate else None
+            }
+
+_oracle = None
+_oracle_lock = threading.Lock()
+
+def get_fee_oracle() -> FeeOracle:
+    """Shared oracle over the Push Chain RPC"""
+    global _oracle
+    with _oracle_lock:
+        if _oracle is None:
+            import rpc_pool
+            _oracle = FeeOracle(lambda: rpc_pool.get_pool().web3)
+    return _oracle
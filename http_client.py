@@ -0,0 +1,155 @@
+import asyncio
+import os
+import random
+import threading
+import weakref
+import requests
+import metrics
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+# Defaults, overridable through the environment or configure()
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.3"))
+BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.3"))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session used by every outbound HTTP call"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def configure(**settings) -> None:
+    """Override timeouts, retry or pool settings and rebuild the shared session"""
+    global _session
+    for name, value in settings.items():
+        if name.upper() not in globals():
+            raise ValueError(f"Unknown HTTP setting: {name}")
+        globals()[name.upper()] = value
+    with _session_lock:
+        _session = None
+
+def _span_for(url: str, json: Any = None):
+    """Metrics span: JSON-RPC bodies are labelled by method, everything else by host"""
+    if isinstance(json, dict) and "method" in json:
+        return metrics.span("rpc", json["method"])
+    if isinstance(json, list) and json and isinstance(json[0], dict) and "method" in json[0]:
+        return metrics.span("rpc", f"batch:{json[0]['method']}")
+    return metrics.span("http", urlsplit(url).netloc)
+
+def get(url: str, params: Optional[Dict] = None, timeout=None, **kwargs) -> requests.Response:
+    """GET through the shared session with pooling, timeouts and retries"""
+    with _span_for(url):
+        return get_session().get(url, params=params, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+
+def post(url: str, json: Any = None, timeout=None, **kwargs) -> requests.Response:
+    """POST through the shared session (not retried, callers decide what is idempotent)"""
+    with _span_for(url, json):
+        return get_session().post(url, json=json, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Exponential backoff with jitter, honouring a Retry-After header when present"""
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return BACKOFF_FACTOR * (2 ** attempt) + random.uniform(0, BACKOFF_JITTER)
+
+class AsyncResponse:
+    def __init__(self, status_code: int, body: Any, headers: Dict):
+        self.status_code = status_code
+        self.headers = headers
+        self._body = body
+
+    def json(self) -> Any:
+        return self._body
+
+class AsyncHttpClient:
+    """asyncio counterpart of the shared session, built on aiohttp"""
+
+    def __init__(self):
+        self._session = None
+
+    async def _get_session(self):
+        import aiohttp
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=POOL_SIZE),
+                timeout=aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+            )
+        return self._session
+
+    async def request(self, method: str, url: str, params: Optional[Dict] = None,
+                      json: Any = None, retry: bool = True) -> AsyncResponse:
+        import aiohttp
+        session = await self._get_session()
+        attempts = MAX_RETRIES + 1 if retry else 1
+        for attempt in range(attempts):
+            last_try = attempt == attempts - 1
+            try:
+                async with session.request(method, url, params=params, json=json) as response:
+                    if response.status in RETRY_STATUSES and not last_try:
+                        await asyncio.sleep(backoff_delay(attempt, response.headers.get("Retry-After")))
+                        continue
+                    body = await response.json(content_type=None) if response.status == 200 else None
+                    return AsyncResponse(response.status, body, dict(response.headers))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last_try:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+
+    async def get(self, url: str, params: Optional[Dict] = None) -> AsyncResponse:
+        with _span_for(url):
+            return await self.request("GET", url, params=params)
+
+    async def post(self, url: str, json: Any = None) -> AsyncResponse:
+        with _span_for(url, json):
+            return await self.request("POST", url, json=json, retry=False)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+# aiohttp sessions are bound to an event loop, so keep one client per loop
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_async_client() -> AsyncHttpClient:
+    """Shared async client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncHttpClient()
+    return client
+
+async def async_get(url: str, params: Optional[Dict] = None) -> AsyncResponse:
+    """Async GET with pooling, timeouts and jittered retries"""
+    return await get_async_client().get(url, params=params)
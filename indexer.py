@@ -0,0 +1,355 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Context, Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from pymongo import DESCENDING, UpdateOne
+from bson.decimal128 import Decimal128
+
+# keccak("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+MAX_REORG_DEPTH = 64
+# The local index only answers queries while the follower has checked in this recently
+MAX_CHECKPOINT_AGE = float(os.getenv("INDEXER_MAX_LAG_SECONDS", "60"))
+# Backfills touching more (token, holder) pairs than this rebuild every balance in one pipeline
+REBUILD_THRESHOLD = 5000
+_DECIMAL128_CONTEXT = Context(prec=34)
+
+def _hex(value) -> str:
+    return value.hex() if hasattr(value, "hex") and not isinstance(value, str) else value
+
+def _amount(value: int) -> Decimal128:
+    # Decimal128 keeps 34 significant digits, enough for any realistic token amount
+    return Decimal128(_DECIMAL128_CONTEXT.create_decimal(Decimal(value)))
+
+def _topic_address(topic) -> str:
+    return "0x" + _hex(topic)[-40:]
+
+class ChainIndexer:
+    """Follows Push Chain blocks into MongoDB: blocks, transactions and ERC-20 Transfer logs"""
+
+    def __init__(self, w3=None, db=None, confirmations: int = 2, range_size: int = 200,
+                 backfill_workers: int = 4):
+        self._w3 = w3
+        self._db = db
+        self.confirmations = confirmations
+        self.range_size = range_size
+        self.backfill_workers = backfill_workers
+        self._stop = threading.Event()
+        self._thread = None
+        self._indexes_ready = False
+
+    @property
+    def w3(self):
+        if self._w3 is None:
+            import rpc_pool
+            self._w3 = rpc_pool.get_pool().web3
+        return self._w3
+
+    @property
+    def db(self):
+        if self._db is None:
+            import mymongodb
+            self._db = mymongodb.get_client()[mymongodb.DB_NAME]
+        if not self._indexes_ready:
+            self._ensure_indexes(self._db)
+        return self._db
+
+    def _ensure_indexes(self, db):
+        db.transactions.create_index("hash", unique=True)
+        db.transactions.create_index([("from", 1), ("block_number", DESCENDING)])
+        db.transactions.create_index([("to", 1), ("block_number", DESCENDING)])
+        db.transactions.create_index("block_number")
+        db.token_transfers.create_index([("tx_hash", 1), ("log_index", 1)], unique=True)
+        db.token_transfers.create_index([("token", 1), ("block_number", DESCENDING)])
+        db.token_transfers.create_index([("token", 1), ("to", 1)])
+        db.token_transfers.create_index([("token", 1), ("from", 1)])
+        db.token_transfers.create_index("block_number")
+        db.token_balances.create_index([("token", 1), ("balance", DESCENDING)])
+        self._indexes_ready = True
+
+    # Checkpoint
+
+    def checkpoint(self) -> Optional[Dict]:
+        return self.db.indexer_state.find_one({"_id": "push_chain"})
+
+    def is_complete(self, max_age: float = MAX_CHECKPOINT_AGE) -> bool:
+        """True once history is indexed back to genesis and the follower is keeping up with the head"""
+        state = self.checkpoint()
+        if not state or state.get("first_block") != 0 or not state.get("updated_at"):
+            return False
+        updated_at = state["updated_at"]
+        if updated_at.tzinfo is None:
+            # pymongo hands datetimes back naive (UTC) unless the client is tz_aware
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - updated_at).total_seconds() <= max_age
+
+    def _save_checkpoint(self, number: int, block_hash: str):
+        self.db.indexer_state.update_one(
+            {"_id": "push_chain"},
+            {"$set": {"last_block": number, "last_hash": block_hash, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+    # Fetching and writing
+
+    def _fetch_range(self, start: int, end: int) -> Tuple[List, List]:
+        blocks = [self.w3.eth.get_block(number, full_transactions=True) for number in range(start, end + 1)]
+        logs = self.w3.eth.get_logs({"fromBlock": start, "toBlock": end, "topics": [TRANSFER_TOPIC]})
+        return blocks, logs
+
+    def _write(self, blocks: Iterable, logs: Iterable) -> Set[Tuple[str, str]]:
+        """Idempotently store blocks, transactions and transfers; return touched (token, holder) pairs"""
+        db = self.db
+        block_ops, tx_ops, transfer_ops = [], [], []
+        timestamps = {}
+        for block in blocks:
+            number = block["number"]
+            timestamp = datetime.fromtimestamp(block["timestamp"], timezone.utc)
+            timestamps[number] = timestamp
+            block_ops.append(UpdateOne({"_id": number}, {"$set": {
+                "hash": _hex(block["hash"]),
+                "parent_hash": _hex(block["parentHash"]),
+                "timestamp": timestamp,
+                "tx_count": len(block["transactions"])
+            }}, upsert=True))
+            for tx in block["transactions"]:
+                tx_ops.append(UpdateOne({"hash": _hex(tx["hash"])}, {"$set": {
+                    "block_number": number,
+                    "from": tx["from"].lower(),
+                    "to": tx["to"].lower() if tx.get("to") else None,
+                    "value": _amount(tx["value"]),
+                    "timestamp": timestamp
+                }}, upsert=True))
+
+        touched = set()
+        for log in logs:
+            # ERC-721 shares the Transfer signature but indexes the token id as a 4th topic
+            if len(log["topics"]) != 3:
+                continue
+            token = log["address"].lower()
+            sender, recipient = _topic_address(log["topics"][1]), _topic_address(log["topics"][2])
+            data = _hex(log["data"])
+            transfer_ops.append(UpdateOne(
+                {"tx_hash": _hex(log["transactionHash"]), "log_index": log["logIndex"]},
+                {"$set": {
+                    "token": token,
+                    "from": sender,
+                    "to": recipient,
+                    "value": _amount(int(data, 16) if data not in ("0x", "") else 0),
+                    "block_number": log["blockNumber"],
+                    "timestamp": timestamps.get(log["blockNumber"])
+                }},
+                upsert=True
+            ))
+            touched.update({(token, sender), (token, recipient)})
+
+        if tx_ops:
+            db.transactions.bulk_write(tx_ops, ordered=False)
+        if transfer_ops:
+            db.token_transfers.bulk_write(transfer_ops, ordered=False)
+        # Blocks last: a stored block means its contents are complete
+        if block_ops:
+            db.blocks.bulk_write(block_ops, ordered=False)
+        return touched
+
+    def _sum_transfers(self, token: str, field: str, holder: str) -> Decimal:
+        result = list(self.db.token_transfers.aggregate([
+            {"$match": {"token": token, field: holder}},
+            {"$group": {"_id": None, "total": {"$sum": "$value"}}}
+        ]))
+        if not result:
+            return Decimal(0)
+        total = result[0]["total"]
+        return total.to_decimal() if isinstance(total, Decimal128) else Decimal(total)
+
+    def _refresh_balances(self, touched: Iterable[Tuple[str, str]]):
+        """Recompute balances from transfers, so replays and rollbacks stay correct"""
+        ops = []
+        for token, holder in touched:
+            balance = self._sum_transfers(token, "to", holder) - self._sum_transfers(token, "from", holder)
+            ops.append(UpdateOne(
+                {"_id": f"{token}:{holder}"},
+                {"$set": {"token": token, "holder": holder, "balance": _amount(int(balance))}},
+                upsert=True
+            ))
+        if ops:
+            self.db.token_balances.bulk_write(ops, ordered=False)
+
+    # Following the head
+
+    def _rollback_to(self, number: int):
+        """Drop everything above block `number` after a reorg"""
+        db = self.db
+        removed = db.token_transfers.find({"block_number": {"$gt": number}}, {"token": 1, "from": 1, "to": 1})
+        touched = set()
+        for transfer in removed:
+            touched.update({(transfer["token"], transfer["from"]), (transfer["token"], transfer["to"])})
+        db.token_transfers.delete_many({"block_number": {"$gt": number}})
+        db.transactions.delete_many({"block_number": {"$gt": number}})
+        db.blocks.delete_many({"_id": {"$gt": number}})
+        self._refresh_balances(touched)
+        stored = db.blocks.find_one({"_id": number})
+        self._save_checkpoint(number, stored["hash"] if stored else None)
+
+    def run_once(self, max_blocks: int = 500) -> int:
+        """Index newly confirmed blocks; returns how many were added"""
+        head = self.w3.eth.block_number - self.confirmations
+        state = self.checkpoint()
+        if state is None:
+            # Fresh index follows from the current head; use backfill() for history
+            block = self.w3.eth.get_block(head)
+            self._save_checkpoint(head - 1, _hex(block["parentHash"]))
+            self.db.indexer_state.update_one({"_id": "push_chain"}, {"$set": {"first_block": head}})
+            state = self.checkpoint()
+
+        # Our tip itself may have been replaced even when no new block arrived
+        if state["last_hash"] and state["last_block"] >= 0:
+            tip = self.w3.eth.get_block(state["last_block"])
+            if _hex(tip["hash"]) != state["last_hash"]:
+                self._handle_reorg(state["last_block"])
+                state = self.checkpoint()
+
+        indexed = 0
+        number = state["last_block"] + 1
+        expected_parent = state["last_hash"]
+        while number <= head and indexed < max_blocks:
+            end = min(head, number + self.range_size - 1, number + max_blocks - indexed - 1)
+            blocks, logs = self._fetch_range(number, end)
+            if expected_parent and _hex(blocks[0]["parentHash"]) != expected_parent:
+                self._handle_reorg(number - 1)
+                state = self.checkpoint()
+                number, expected_parent = state["last_block"] + 1, state["last_hash"]
+                continue
+            self._refresh_balances(self._write(blocks, logs))
+            self._save_checkpoint(end, _hex(blocks[-1]["hash"]))
+            indexed += len(blocks)
+            number, expected_parent = end + 1, _hex(blocks[-1]["hash"])
+        if not indexed:
+            # Nothing new, but we are caught up: keep the checkpoint fresh for is_complete()
+            self.db.indexer_state.update_one({"_id": "push_chain"},
+                                             {"$set": {"updated_at": datetime.now(timezone.utc)}})
+        return indexed
+
+    def _handle_reorg(self, number: int):
+        # Walk back until our stored block matches the canonical chain
+        for depth in range(MAX_REORG_DEPTH):
+            candidate = number - depth
+            stored = self.db.blocks.find_one({"_id": candidate})
+            canonical = self.w3.eth.get_block(candidate)
+            if stored is None or stored["hash"] == _hex(canonical["hash"]):
+                self._rollback_to(candidate)
+                return
+        raise RuntimeError(f"Reorg deeper than {MAX_REORG_DEPTH} blocks at {number}")
+
+    def start(self, poll_interval: float = 2.0):
+        """Follow new blocks in a background thread"""
+        if self._thread is not None:
+            return
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    if self.run_once() == 0:
+                        self._stop.wait(poll_interval)
+                except Exception as e:
+                    print(f"❌ Indexer error: {str(e)}")
+                    self._stop.wait(poll_interval)
+        self._thread = threading.Thread(target=loop, name="chain-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # Backfill
+
+    def backfill(self, start_block: int, end_block: int) -> int:
+        """Index a historical range in parallel chunks, then rebuild balances"""
+        ranges = [
+            (start, min(start + self.range_size - 1, end_block))
+            for start in range(start_block, end_block + 1, self.range_size)
+        ]
+        with ThreadPoolExecutor(max_workers=self.backfill_workers) as pool:
+            touched = set().union(*pool.map(lambda r: self._write(*self._fetch_range(*r)), ranges))
+        if len(touched) > REBUILD_THRESHOLD:
+            self.rebuild_balances()
+        else:
+            self._refresh_balances(touched)
+
+        # Extend the contiguous indexed range if this backfill joins onto it
+        state = self.checkpoint()
+        if state is None:
+            last = self.w3.eth.get_block(end_block)
+            self._save_checkpoint(end_block, _hex(last["hash"]))
+            self.db.indexer_state.update_one({"_id": "push_chain"}, {"$set": {"first_block": start_block}})
+        elif start_block <= state.get("first_block", start_block) <= end_block + 1:
+            # A long backfill must not leave the checkpoint looking stale to is_complete()
+            self.db.indexer_state.update_one({"_id": "push_chain"}, {"$set": {
+                "first_block": start_block, "updated_at": datetime.now(timezone.utc)
+            }})
+        return end_block - start_block + 1
+
+    def rebuild_balances(self):
+        """Recompute every token balance from the stored transfers"""
+        self.db.token_transfers.aggregate([
+            {"$project": {"token": 1, "legs": [
+                {"holder": "$to", "delta": "$value"},
+                {"holder": "$from", "delta": {"$multiply": ["$value", -1]}}
+            ]}},
+            {"$unwind": "$legs"},
+            {"$group": {"_id": {"$concat": ["$token", ":", "$legs.holder"]},
+                        "token": {"$first": "$token"},
+                        "holder": {"$first": "$legs.holder"},
+                        "balance": {"$sum": "$legs.delta"}}},
+            {"$merge": {"into": "token_balances", "whenMatched": "replace"}}
+        ])
+
+    # Queries shaped like the explorer API items
+
+    def transactions_for(self, address: str, limit: int = 10) -> List[Dict]:
+        address = address.lower()
+        db = self.db
+        # Two index scans merged in memory instead of an unindexed $or sort
+        found = list(db.transactions.find({"from": address}).sort("block_number", DESCENDING).limit(limit))
+        found += list(db.transactions.find({"to": address}).sort("block_number", DESCENDING).limit(limit))
+        unique = {tx["hash"]: tx for tx in found}.values()
+        newest = sorted(unique, key=lambda tx: tx["block_number"], reverse=True)[:limit]
+        return [{
+            "hash": tx["hash"],
+            "block_number": tx["block_number"],
+            "from": {"hash": tx["from"]},
+            "to": {"hash": tx["to"]} if tx["to"] else None,
+            "value": str(tx["value"].to_decimal()),
+            "timestamp": tx["timestamp"].isoformat()
+        } for tx in newest]
+
+    def token_transfers_for(self, token_address: str, limit: int = 20) -> List[Dict]:
+        transfers = self.db.token_transfers.find({"token": token_address.lower()}) \
+            .sort("block_number", DESCENDING).limit(limit)
+        return [{
+            "tx_hash": transfer["tx_hash"],
+            "log_index": transfer["log_index"],
+            "block_number": transfer["block_number"],
+            "from": {"hash": transfer["from"]},
+            "to": {"hash": transfer["to"]},
+            "total": {"value": str(transfer["value"].to_decimal())},
+            "timestamp": transfer["timestamp"].isoformat() if transfer.get("timestamp") else None
+        } for transfer in transfers]
+
+    def token_holders_for(self, token_address: str, limit: int = 50) -> List[Dict]:
+        holders = self.db.token_balances.find(
+            {"token": token_address.lower(), "balance": {"$gt": Decimal128("0")}}
+        ).sort("balance", DESCENDING).limit(limit)
+        return [{
+            "address": {"hash": holder["holder"]},
+            "value": str(holder["balance"].to_decimal())
+        } for holder in holders]
+
+_indexer = None
+
+def get_indexer() -> ChainIndexer:
+    """Shared indexer over the agent's RPC endpoint and MongoDB"""
+    global _indexer
+    if _indexer is None:
+        _indexer = ChainIndexer()
+    return _indexer
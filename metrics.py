@@ -0,0 +1,246 @@
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# AGENT_METRICS=0 turns instrumentation into a no-op (tools are handed over unwrapped)
+ENABLED = os.getenv("AGENT_METRICS", "1") != "0"
+METRICS_PORT = os.getenv("METRICS_PORT")
+TRACE_LOG = os.getenv("METRICS_TRACE_LOG")
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Cumulative-bucket latency histogram in seconds"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.help: Dict[str, str] = {}
+
+    def inc(self, name: str, labels: Labels, amount: float = 1.0):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0.0) + amount
+
+    def observe(self, name: str, labels: Labels, seconds: float):
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+registry = Registry()
+registry.help.update({
+    "agent_tool_calls_total": "Tool invocations",
+    "agent_tool_errors_total": "Tool invocations that raised or returned an error",
+    "agent_tool_duration_seconds": "Tool wall time",
+    "agent_tool_outbound_seconds_total": "Time a tool spent waiting on outbound calls, by kind",
+    "agent_outbound_duration_seconds": "Outbound HTTP, RPC, Mongo and LLM call latency",
+    "agent_outbound_errors_total": "Outbound calls that failed"
+})
+
+# Spans of the tool call running in this context, if any
+_current_trace: contextvars.ContextVar[Optional[List[Dict]]] = contextvars.ContextVar("tool_trace", default=None)
+_trace_lock = threading.Lock()
+
+def record_span(kind: str, target: str, seconds: float, error: bool = False):
+    """Record one finished outbound call and attach it to the current tool call"""
+    labels = (("kind", kind), ("target", target))
+    registry.observe("agent_outbound_duration_seconds", labels, seconds)
+    if error:
+        registry.inc("agent_outbound_errors_total", labels)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.append({"kind": kind, "target": target, "ms": round(seconds * 1000, 3), "error": error})
+
+def submit_in_context(executor, fn: Callable, *args):
+    """executor.submit running fn in a copy of the caller's context, so its spans reach the current tool"""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+@contextmanager
+def span(kind: str, target: str):
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record_span(kind, target, time.perf_counter() - start, error)
+
+def _is_error_result(result) -> bool:
+    # Tools report most failures as values rather than exceptions
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list):
+        # Explorer tools wrap failures as [{"error": ...}]
+        return any(isinstance(item, dict) and "error" in item for item in result)
+    if isinstance(result, str):
+        return result.startswith(("❌", "Error", "Transaction failed", "AI response error", "PC Balance: Error"))
+    return False
+
+def _write_trace(entry: Dict):
+    with _trace_lock:
+        with open(TRACE_LOG, "a") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+
+def instrument_tool(fn: Callable) -> Callable:
+    """Count calls, errors and latency for a tool; returns fn itself when metrics are off"""
+    if not ENABLED:
+        return fn
+    name = fn.__name__
+    tool_labels = (("tool", name),)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        spans: List[Dict] = []
+        token = _current_trace.set(spans)
+        start = time.perf_counter()
+        error = True
+        try:
+            result = fn(*args, **kwargs)
+            error = _is_error_result(result)
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_trace.reset(token)
+            registry.inc("agent_tool_calls_total", tool_labels)
+            registry.observe("agent_tool_duration_seconds", tool_labels, elapsed)
+            if error:
+                registry.inc("agent_tool_errors_total", tool_labels)
+            by_kind: Dict[str, float] = {}
+            for item in spans:
+                by_kind[item["kind"]] = by_kind.get(item["kind"], 0.0) + item["ms"] / 1000
+            for kind, seconds in by_kind.items():
+                registry.inc("agent_tool_outbound_seconds_total", (("tool", name), ("kind", kind)), seconds)
+            if TRACE_LOG:
+                _write_trace({"tool": name, "at": time.time(), "ms": round(elapsed * 1000, 3),
+                              "error": error, "spans": spans})
+
+    return wrapper
+
+def rpc_middleware(make_request, w3):
+    """web3 middleware recording every JSON-RPC request as an "rpc" span"""
+    def middleware(method, params):
+        with span("rpc", method):
+            response = make_request(method, params)
+        if ENABLED and isinstance(response, dict) and "error" in response:
+            registry.inc("agent_outbound_errors_total", (("kind", "rpc"), ("target", method)))
+        return response
+    return middleware
+
+def instrument_web3(w3):
+    """Attach the RPC span middleware to a Web3 instance"""
+    if ENABLED:
+        w3.middleware_onion.add(rpc_middleware, "metrics")
+    return w3
+
+def mongo_listeners() -> list:
+    """pymongo event listeners to pass to MongoClient(event_listeners=...)"""
+    if not ENABLED:
+        return []
+    from pymongo import monitoring
+
+    class CommandTimer(monitoring.CommandListener):
+        # Command events fire on the calling thread, so the tool's trace is in scope
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            record_span("mongo", event.command_name, event.duration_micros / 1e6)
+
+        def failed(self, event):
+            record_span("mongo", event.command_name, event.duration_micros / 1e6, error=True)
+
+    return [CommandTimer()]
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (
+        key + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+def render_prometheus() -> str:
+    """Current metrics in the Prometheus text exposition format"""
+    lines = []
+    with registry._lock:
+        for name, series in sorted(registry.counters.items()):
+            lines.append(f"# HELP {name} {registry.help.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in series.items():
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for name, series in sorted(registry.histograms.items()):
+            lines.append(f"# HELP {name} {registry.help.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total:g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+_server = None
+
+def serve(port: Optional[int] = None):
+    """Expose /metrics over HTTP on a daemon thread (METRICS_PORT by default)"""
+    global _server
+    port = port or (int(METRICS_PORT) if METRICS_PORT else None)
+    if _server is not None or port is None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    _server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
@@ -1,7 +1,14 @@
-from pymongo import MongoClient, errors
+from pymongo import MongoClient, UpdateOne, errors
 from dotenv import load_dotenv
+from cache import ResponseCache, MISS
+import metrics
+import base64
+import csv
+import json
 import os
-from web3 import Web3
+import re
+import threading
+import time
 
 # Load environment variables
 load_dotenv(
@@ -11,33 +18,140 @@ MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/" \
 "")
 DB_NAME = "PushChainAgent"
 COLLECTION_NAME = "address_book"
+META_COLLECTION_NAME = "address_book_meta"
 
-# MongoDB setup
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-collection = db[COLLECTION_NAME]
+# Read-through cache of username -> address, dropped whenever the book version moves
+VERSION_CHECK_INTERVAL = float(os.getenv("ADDRESS_BOOK_VERSION_CHECK", "1.0"))
+USE_CHANGE_STREAM = os.getenv("ADDRESS_BOOK_CHANGE_STREAM", "0") == "1"
+ADDRESS_PATTERN = re.compile(r"^(0x)?[0-9a-fA-F]{40}$")
 
-# Create indexes for better performance
-collection.create_index("username", unique=True)
-collection.create_index("address", unique=False)
+# MongoDB client and collection are created on first use
+_init_lock = threading.Lock()
+_client = None
+_collection = None
+
+def get_client() -> MongoClient:
+    """Shared MongoClient (connects lazily)"""
+    global _client
+    with _init_lock:
+        if _client is None:
+            _client = MongoClient(MONGO_URI, event_listeners=metrics.mongo_listeners())
+    return _client
+
+def get_collection():
+    """Address book collection, with indexes ensured once per process"""
+    global _collection
+    if _collection is None:
+        collection = get_client()[DB_NAME][COLLECTION_NAME]
+        with _init_lock:
+            if _collection is None:
+                # Create indexes for better performance
+                collection.create_index("username", unique=True)
+                collection.create_index("address", unique=False)
+                collection.create_index([("username_lc", 1), ("username", 1)])
+                collection.create_index([("address_lc", 1), ("username", 1)])
+                _backfill_normalized_fields(collection)
+                _collection = collection
+    return _collection
+
+def _normalized_fields(username: str, checksum_address: str) -> dict:
+    """Stored lowercase copies so prefix search can use plain index range scans"""
+    return {
+        "address": checksum_address,
+        "username_lc": username.lower(),
+        "address_lc": checksum_address.lower()
+    }
+
+def _backfill_normalized_fields(collection):
+    """Add normalized fields to entries written before they existed"""
+    updates = [
+        UpdateOne({"_id": user["_id"]}, {"$set": _normalized_fields(user["username"], user["address"])})
+        for user in collection.find({"username_lc": None}, {"username": 1, "address": 1})
+    ]
+    if updates:
+        collection.bulk_write(updates, ordered=False)
+
+def _web3():
+    from web3 import Web3
+    return Web3
+
+address_cache = ResponseCache(max_bytes=8 * 1024 * 1024)
+_cache_version = None
+_version_checked_at = 0.0
+_watcher = None
+
+def _meta():
+    return get_client()[DB_NAME][META_COLLECTION_NAME]
+
+def _bump_version():
+    """Record a change so other workers drop their cached addresses"""
+    global _cache_version
+    doc = _meta().find_one_and_update(
+        {"_id": COLLECTION_NAME}, {"$inc": {"version": 1}}, upsert=True, return_document=True
+    )
+    # Anything other than our own single increment means another worker wrote too
+    if _cache_version is None or doc["version"] != _cache_version + 1:
+        address_cache.clear()
+    _cache_version = doc["version"]
+
+def _watch_changes():
+    try:
+        with get_collection().watch(full_document="updateLookup") as stream:
+            for change in stream:
+                username = (change.get("fullDocument") or {}).get("username")
+                if username and change["operationType"] in ("insert", "update", "replace"):
+                    address_cache.set(username, change["fullDocument"]["address"])
+                else:
+                    address_cache.clear()
+    except Exception as e:
+        # Change streams need a replica set; version polling still covers us
+        print(f"❌ Address book change stream unavailable: {str(e)}")
+
+def _sync_cache():
+    global _cache_version, _version_checked_at, _watcher
+    if USE_CHANGE_STREAM and _watcher is None:
+        _watcher = threading.Thread(target=_watch_changes, name="address-book-watch", daemon=True)
+        _watcher.start()
+    now = time.monotonic()
+    if now - _version_checked_at < VERSION_CHECK_INTERVAL:
+        return
+    _version_checked_at = now
+    doc = _meta().find_one({"_id": COLLECTION_NAME}) or {}
+    version = doc.get("version", 0)
+    if version != _cache_version:
+        address_cache.clear()
+        _cache_version = version
+
+def __getattr__(name):
+    # Keep `mymongodb.client` / `mymongodb.collection` working without connecting at import
+    if name == "client":
+        return get_client()
+    if name == "db":
+        return get_client()[DB_NAME]
+    if name == "collection":
+        return get_collection()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def add_to_book(username: str, address: str) -> str:
     """Add a user and their Push Chain address to the address book"""
     try:
         # Validate Ethereum address format
-        if not Web3.is_address(address):
+        if not _web3().is_address(address):
             return f"Invalid address format: {address}"
         
         # Convert to checksum address
-        checksum_address = Web3.to_checksum_address(address)
+        checksum_address = _web3().to_checksum_address(address)
         
         # Insert or update user
-        result = collection.update_one(
+        result = get_collection().update_one(
             {"username": username},
-            {"$set": {"address": checksum_address}},
+            {"$set": _normalized_fields(username, checksum_address)},
             upsert=True
         )
         
+        _bump_version()
+        address_cache.set(username, checksum_address)
+        
         if result.upserted_id:
             return f"✅ Added {username} with address {checksum_address}"
         else:
@@ -51,8 +165,14 @@ def add_to_book(username: str, address: str) -> str:
 def fetch_address_from_book(username: str) -> str:
     """Retrieve address for a given username"""
     try:
-        user = collection.find_one({"username": username})
+        _sync_cache()
+        address = address_cache.get(username)
+        if address is not MISS:
+            return address
+        
+        user = get_collection().find_one({"username": username})
         if user:
+            address_cache.set(username, user['address'])
             return user['address']
         return f"❌ No address found for {username}"
     except Exception as e:
@@ -61,17 +181,19 @@ def fetch_address_from_book(username: str) -> str:
 def update_address(username: str, new_address: str) -> str:
     """Update address for existing user"""
     try:
-        if not Web3.is_address(new_address):
+        if not _web3().is_address(new_address):
             return f"❌ Invalid address format: {new_address}"
         
-        checksum_address = Web3.to_checksum_address(new_address)
+        checksum_address = _web3().to_checksum_address(new_address)
         
-        result = collection.update_one(
+        result = get_collection().update_one(
             {"username": username},
-            {"$set": {"address": checksum_address}}
+            {"$set": _normalized_fields(username, checksum_address)}
         )
         
         if result.modified_count > 0:
+            _bump_version()
+            address_cache.set(username, checksum_address)
             return f"✅ Updated address for {username} to {checksum_address}"
         return f"❌ User {username} not found"
         
@@ -81,42 +203,138 @@ def update_address(username: str, new_address: str) -> str:
 def delete_user(username: str) -> str:
     """Remove user from address book"""
     try:
-        result = collection.delete_one({"username": username})
+        result = get_collection().delete_one({"username": username})
         if result.deleted_count > 0:
+            _bump_version()
+            address_cache.delete(username)
             return f"✅ Removed {username} from address book"
         return f"❌ User {username} not found"
     except Exception as e:
         return f"❌ Error: {str(e)}"
 
-def list_all_users() -> str:
-    """List all users in the address book"""
+def _prefix_filter(field: str, prefix: str) -> dict:
+    # A half-open range on the lowercase field is an index bound, unlike a regex
+    return {field: {"$gte": prefix, "$lt": prefix + "\uffff"}}
+
+def _encode_cursor(key: str, username: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([key, username]).encode()).decode()
+
+def _decode_cursor(cursor: str) -> list:
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+def iter_users(query: str = "", cursor: str = None, batch_size: int = 500):
+    """Stream address book entries in key order, optionally matching a prefix"""
+    prefix = query.strip().lower()
+    field = "address_lc" if prefix.startswith("0x") else "username_lc"
+    clauses = [_prefix_filter(field, prefix)] if prefix else []
+    if cursor:
+        # Keyset pagination on (normalized key, username) so equal keys are not skipped
+        key, username = _decode_cursor(cursor)
+        clauses.append({"$or": [{field: {"$gt": key}}, {field: key, "username": {"$gt": username}}]})
+    filters = {"$and": clauses} if clauses else {}
+    users = get_collection().find(
+        filters, {"_id": 0, "username": 1, "address": 1, field: 1}
+    ).sort([(field, 1), ("username", 1)]).batch_size(batch_size)
+    for user in users:
+        yield user
+
+def _page(query: str, limit: int, cursor: str):
+    users = []
+    next_cursor = None
+    field = "address_lc" if query.strip().lower().startswith("0x") else "username_lc"
+    for user in iter_users(query, cursor=cursor, batch_size=limit + 1):
+        if len(users) == limit:
+            last = users[-1]
+            next_cursor = _encode_cursor(last[field], last["username"])
+            break
+        users.append(user)
+    return users, next_cursor
+
+def list_all_users(limit: int = 100, cursor: str = None) -> str:
+    """List users in the address book, one page at a time"""
     try:
-        users = list(collection.find({}, {"_id": 0, "username": 1, "address": 1}))
+        users, next_cursor = _page("", limit, cursor)
         if users:
-            result = "📞 Address Book:\n"
-            for user in users:
-                result += f"  • {user['username']}: {user['address']}\n"
-            return result
+            lines = ["📞 Address Book:\n"]
+            lines.extend(f"  • {user['username']}: {user['address']}\n" for user in users)
+            if next_cursor:
+                lines.append(f"  … more entries, continue with cursor='{next_cursor}'\n")
+            return "".join(lines)
         return "📭 Address book is empty"
     except Exception as e:
         return f"❌ Error: {str(e)}"
 
-def search_users(query: str) -> str:
-    """Search users by username or address"""
+def search_users(query: str, limit: int = 20, cursor: str = None) -> str:
+    """Search users by username prefix, or by address prefix when the query starts with 0x"""
     try:
-        regex_query = {"$regex": query, "$options": "i"}
-        users = list(collection.find({
-            "$or": [
-                {"username": regex_query},
-                {"address": regex_query}
-            ]
-        }, {"_id": 0, "username": 1, "address": 1}))
+        users, next_cursor = _page(query, limit, cursor)
         
         if users:
-            result = f"🔍 Search results for '{query}':\n"
-            for user in users:
-                result += f"  • {user['username']}: {user['address']}\n"
-            return result
+            lines = [f"🔍 Search results for '{query}':\n"]
+            lines.extend(f"  • {user['username']}: {user['address']}\n" for user in users)
+            if next_cursor:
+                lines.append(f"  … more results, continue with cursor='{next_cursor}'\n")
+            return "".join(lines)
         return f"❌ No users found matching '{query}'"
     except Exception as e:
-        return f"❌ Error: {str(e)}"
\ No newline at end of file
+        return f"❌ Error: {str(e)}"
+
+def _checksum_addresses(addresses: list) -> list:
+    """Validate and checksum a column of addresses in one pass; None marks an invalid entry"""
+    from eth_utils import to_checksum_address
+    checksummed = {}
+    for address in set(addresses):
+        if not isinstance(address, str) or not ADDRESS_PATTERN.match(address):
+            checksummed[address] = None
+            continue
+        candidate = to_checksum_address(address)
+        body = address[2:] if address.startswith("0x") else address
+        # Mixed-case input carries its own checksum, which must match
+        mixed_case = body != body.lower() and body != body.upper()
+        checksummed[address] = None if mixed_case and "0x" + body != candidate else candidate
+    return [checksummed[address] for address in addresses]
+
+def import_addresses(entries: list) -> str:
+    """Bulk add [username, address] pairs to the address book"""
+    try:
+        usernames = [str(entry[0]).strip() for entry in entries]
+        addresses = [entry[1].strip() if isinstance(entry[1], str) else entry[1] for entry in entries]
+        checksummed = _checksum_addresses(addresses)
+        
+        # Later rows win when a username repeats
+        valid = {}
+        invalid = []
+        for username, address, checksum_address in zip(usernames, addresses, checksummed):
+            if checksum_address is None or not username:
+                invalid.append(username or str(address))
+            else:
+                valid[username] = checksum_address
+        
+        if valid:
+            result = get_collection().bulk_write([
+                UpdateOne({"username": username}, {"$set": _normalized_fields(username, address)}, upsert=True)
+                for username, address in valid.items()
+            ], ordered=False)
+            _bump_version()
+            address_cache.clear()
+            added, updated = result.upserted_count, result.modified_count
+        else:
+            added = updated = 0
+        
+        message = f"✅ Imported {len(valid)} contacts ({added} new, {updated} updated)"
+        if invalid:
+            message += f", skipped {len(invalid)} invalid: {', '.join(invalid[:10])}"
+        return message
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+
+def import_addresses_csv(path: str) -> str:
+    """Bulk add contacts from a CSV file with username,address columns"""
+    try:
+        with open(path, newline="") as f:
+            rows = list(csv.reader(f))
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+    if rows and [cell.strip().lower() for cell in rows[0][:2]] == ["username", "address"]:
+        rows = rows[1:]
+    return import_addresses([row[:2] for row in rows if len(row) >= 2])
@@ -0,0 +1,110 @@
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+# Substrings of node errors that mean our local nonce view is out of date
+NONCE_ERRORS = (
+    "nonce too low",
+    "invalid nonce",
+    "replacement transaction underpriced",
+)
+
+def is_nonce_error(error: Exception) -> bool:
+    """Check whether a send failed because of a stale nonce"""
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERRORS)
+
+def is_already_known(error) -> bool:
+    """The node already holds this exact signed transaction, so the send went through"""
+    return "already known" in str(error).lower()
+
+def transaction_hash(raw_transaction: Union[bytes, str]):
+    """Hash of a signed transaction, as send_raw_transaction would have returned it"""
+    from eth_utils import keccak
+    from hexbytes import HexBytes
+    if isinstance(raw_transaction, str):
+        raw_transaction = bytes.fromhex(raw_transaction[2:] if raw_transaction.startswith("0x") else raw_transaction)
+    return HexBytes(keccak(raw_transaction))
+
+class _AccountNonce:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next_nonce: Optional[int] = None
+        self.stale = True
+
+class NonceManager:
+    """Allocates transaction nonces locally, one counter per sender"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._accounts: Dict[str, _AccountNonce] = {}
+
+    def _account(self, address: str) -> _AccountNonce:
+        key = address.lower()
+        state = self._accounts.get(key)
+        if state is None:
+            with self._lock:
+                state = self._accounts.setdefault(key, _AccountNonce())
+        return state
+
+    def _sync(self, w3, address: str, state: _AccountNonce):
+        state.next_nonce = w3.eth.get_transaction_count(address, "pending")
+        state.stale = False
+
+    def allocate(self, w3, address: str) -> int:
+        """Reserve the next nonce for address, syncing with the chain only when needed"""
+        return self.allocate_many(w3, address, 1).start
+
+    def allocate_many(self, w3, address: str, count: int) -> range:
+        """Reserve a contiguous block of nonces for address"""
+        state = self._account(address)
+        with state.lock:
+            if state.stale or state.next_nonce is None:
+                self._sync(w3, address, state)
+            start = state.next_nonce
+            state.next_nonce += count
+        return range(start, start + count)
+
+    def release(self, address: str, nonce: int, error: Optional[Exception] = None):
+        """Return a nonce whose transaction never reached the chain"""
+        state = self._account(address)
+        with state.lock:
+            if error is not None and is_nonce_error(error):
+                state.stale = True
+            elif state.next_nonce == nonce + 1:
+                state.next_nonce = nonce
+            else:
+                # Later nonces are already out, so this one is now a gap
+                state.stale = True
+
+    def resync(self, address: str):
+        """Force the next allocation for address to re-read the chain nonce"""
+        state = self._account(address)
+        with state.lock:
+            state.stale = True
+
+# Shared by agent.py and Scheduler.py so sends from one wallet never collide
+nonce_manager = NonceManager()
+
+def send_with_nonce(w3, address: str, transaction: Dict, private_key: str) -> Tuple:
+    """Sign and send transaction with the next local nonce for address; returns (tx_hash, raw_transaction)
+
+    Retries once after a resync if the node says the nonce is stale. The nonce
+    is only released while the send has not gone through.
+    """
+    for attempt in range(2):
+        nonce = nonce_manager.allocate(w3, address)
+        try:
+            signed = w3.eth.account.sign_transaction({**transaction, "nonce": nonce}, private_key)
+            try:
+                tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
+            except Exception as e:
+                # Re-signing with a new nonce here would pay the recipient twice
+                if not is_already_known(e):
+                    raise
+                tx_hash = transaction_hash(signed.rawTransaction)
+        except Exception as e:
+            nonce_manager.release(address, nonce, e)
+            if attempt or not is_nonce_error(e):
+                raise
+            continue
+        return tx_hash, signed.rawTransaction
@@ -0,0 +1,124 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import metrics
+from eth_utils import keccak, to_checksum_address
+from token_registry import TokenRegistry
+
+# Multicall3 is deployed at the same address on most EVM chains
+MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+# Sub-calls per aggregated eth_call; keeps each request under node gas and payload caps
+MULTICALL_CHUNK = int(os.getenv("PORTFOLIO_MULTICALL_CHUNK", "500"))
+MULTICALL_CONCURRENCY = int(os.getenv("PORTFOLIO_CONCURRENCY", "4"))
+
+AGGREGATE3_SELECTOR = keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+BALANCE_OF_SELECTOR = keccak(text="balanceOf(address)")[:4]
+DECIMALS_SELECTOR = keccak(text="decimals()")[:4]
+
+Call = Tuple[str, bytes]
+
+def encode_balance_of(holder: str) -> bytes:
+    return BALANCE_OF_SELECTOR + bytes(12) + bytes.fromhex(holder[2:].lower())
+
+def decode_uint(data: Optional[bytes]) -> Optional[int]:
+    """First 32-byte word as an integer; None for a failed or empty return"""
+    if not data or len(data) < 32:
+        return None
+    return int.from_bytes(data[:32], "big")
+
+class Portfolio:
+    """ERC-20 balances for many holders across the token list, via Multicall3 aggregated eth_calls"""
+
+    def __init__(self, get_w3: Callable, registry: TokenRegistry, multicall: str = MULTICALL3_ADDRESS,
+                 chunk_size: int = MULTICALL_CHUNK, concurrency: int = MULTICALL_CONCURRENCY):
+        self._get_w3 = get_w3
+        self.registry = registry
+        self.multicall = to_checksum_address(multicall)
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="portfolio")
+        # Token address (lower case) -> decimals; None when the token does not answer decimals()
+        self._decimals: Dict[str, Optional[int]] = {}
+        self._lock = threading.Lock()
+
+    def _aggregate(self, calls: Sequence[Call]) -> List[Optional[bytes]]:
+        """One aggregate3 eth_call with allowFailure set, so a broken token cannot sink the chunk"""
+        from eth_abi import decode, encode
+        data = AGGREGATE3_SELECTOR + encode(
+            ["(address,bool,bytes)[]"], [[(to_checksum_address(target), True, call) for target, call in calls]]
+        )
+        raw = self._get_w3().eth.call({"to": self.multicall, "data": "0x" + data.hex()})
+        if not raw:
+            raise RuntimeError(f"No Multicall3 contract at {self.multicall}; set MULTICALL3_ADDRESS")
+        (results,) = decode(["(bool,bytes)[]"], bytes(raw))
+        return [data if success else None for success, data in results]
+
+    def call_many(self, calls: Sequence[Call]) -> List[Optional[bytes]]:
+        """Run any number of calls as bounded multicall chunks, several chunks in flight at once"""
+        chunks = [calls[i:i + self.chunk_size] for i in range(0, len(calls), self.chunk_size)]
+        results: List[Optional[bytes]] = []
+        # Each chunk runs in the caller's context so its RPC spans reach the current tool
+        for future in [metrics.submit_in_context(self._executor, self._aggregate, chunk) for chunk in chunks]:
+            results.extend(future.result())
+        return results
+
+    def decimals(self, tokens: Sequence[Dict]) -> List[Optional[int]]:
+        """Decimals per token: the token list's value if it has one, else decimals() on chain, cached"""
+        missing = []
+        with self._lock:
+            for token in tokens:
+                key = token["address"].lower()
+                if key in self._decimals:
+                    continue
+                try:
+                    self._decimals[key] = int(token["decimals"])
+                except (KeyError, TypeError, ValueError):
+                    missing.append(key)
+        if missing:
+            answers = self.call_many([(address, DECIMALS_SELECTOR) for address in missing])
+            with self._lock:
+                for address, data in zip(missing, answers):
+                    self._decimals[address] = decode_uint(data)
+        return [self._decimals[token["address"].lower()] for token in tokens]
+
+    def balances(self, holders: Sequence[str], tokens: Sequence[Dict]) -> np.ndarray:
+        """(holders x tokens) decimal-scaled balances; NaN where a call failed or decimals are unknown"""
+        if not holders or not tokens:
+            return np.zeros((len(holders), len(tokens)))
+        decimals = np.array([np.nan if d is None else d for d in self.decimals(tokens)], dtype=np.float64)
+        calls = [(token["address"], encode_balance_of(holder)) for holder in holders for token in tokens]
+        raw = np.array([np.nan if value is None else float(value)
+                        for value in map(decode_uint, self.call_many(calls))], dtype=np.float64)
+        return raw.reshape(len(holders), len(tokens)) / np.power(10.0, decimals)
+
+    def query(self, holders: Sequence[str], tokens: Optional[Sequence[Dict]] = None) -> Dict[str, List[Dict]]:
+        """Non-zero holdings per holder across the listed ERC-20 tokens, largest first"""
+        if tokens is None:
+            tokens = self.registry.list_tokens("ERC-20")
+        tokens = list(tokens)
+        holders = [to_checksum_address(holder) for holder in holders]
+        amounts = self.balances(holders, tokens)
+        held = np.nan_to_num(amounts, nan=0.0) > 0
+        portfolio = {}
+        for row, holder in enumerate(holders):
+            columns = np.flatnonzero(held[row])
+            columns = columns[np.argsort(-amounts[row, columns], kind="stable")]
+            portfolio[holder] = [
+                {"symbol": tokens[col].get("symbol"), "name": tokens[col].get("name"),
+                 "address": tokens[col]["address"], "balance": float(amounts[row, col])}
+                for col in columns
+            ]
+        return portfolio
+
+_portfolio = None
+_portfolio_lock = threading.Lock()
+
+def get_portfolio(registry: Optional[TokenRegistry] = None) -> Portfolio:
+    """Shared Portfolio over the Push Chain RPC pool and token list"""
+    global _portfolio
+    with _portfolio_lock:
+        if _portfolio is None:
+            import rpc_pool
+            _portfolio = Portfolio(lambda: rpc_pool.get_pool().web3, registry or TokenRegistry())
+    return _portfolio
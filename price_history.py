@@ -0,0 +1,202 @@
+import os
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from CoinGecko import CoinGeckoToken
+
+PRICE_HISTORY_DIR = os.getenv(
+    "PRICE_HISTORY_DIR",
+    os.path.join(os.path.expanduser("~"), ".push_agent", "price_history")
+)
+# Rows of one (len(COLUMNS), n) float64 block per coin, so a single rename swaps every column at once
+COLUMNS = ("ts", "price", "market_cap", "volume")
+# CoinGecko refreshes market data about every five minutes
+MIN_REFRESH_SECONDS = 300
+INTERVALS = {
+    "5m": 300,
+    "1h": 3600,
+    "4h": 4 * 3600,
+    "1d": 86400,
+    "1w": 7 * 86400
+}
+
+def resample_ohlc(ts: np.ndarray, values: np.ndarray, interval_seconds: int) -> Dict[str, np.ndarray]:
+    """Bucket samples (ts in ms, ascending) into OHLC candles"""
+    if len(ts) == 0:
+        empty = np.array([], dtype=np.float64)
+        return {"ts": np.array([], dtype=np.int64), "open": empty, "high": empty, "low": empty, "close": empty}
+    buckets = ts // (interval_seconds * 1000)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(ts)])) - 1
+    return {
+        "ts": buckets[starts] * interval_seconds * 1000,
+        "open": values[starts],
+        "high": np.maximum.reduceat(values, starts),
+        "low": np.minimum.reduceat(values, starts),
+        "close": values[ends]
+    }
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average; the first window-1 points are NaN"""
+    result = np.full(len(values), np.nan)
+    if window <= 0 or len(values) < window:
+        return result
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    result[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return result
+
+def returns(values: np.ndarray, log: bool = False) -> np.ndarray:
+    """Period-over-period simple (or log) returns"""
+    if len(values) < 2:
+        return np.array([], dtype=np.float64)
+    if log:
+        return np.diff(np.log(values))
+    return values[1:] / values[:-1] - 1
+
+def volatility(values: np.ndarray, periods_per_year: Optional[float] = None) -> float:
+    """Standard deviation of log returns, annualized when periods_per_year is given"""
+    log_returns = returns(values, log=True)
+    if len(log_returns) < 2:
+        return 0.0
+    sigma = float(np.std(log_returns, ddof=1))
+    return float(sigma * np.sqrt(periods_per_year)) if periods_per_year else sigma
+
+def _as_column(pairs: Sequence, ts: np.ndarray) -> np.ndarray:
+    """Align a CoinGecko [[ms, value], ...] list onto the price timestamps"""
+    if not pairs:
+        return np.full(len(ts), np.nan)
+    data = np.asarray(pairs, dtype=np.float64)
+    if len(data) == len(ts) and np.array_equal(data[:, 0].astype(np.int64), ts):
+        return data[:, 1]
+    return np.interp(ts, data[:, 0], data[:, 1])
+
+class PriceHistory:
+    """Local columnar price history for one CoinGecko coin, topped up incrementally"""
+
+    def __init__(self, token_id: str = "push-protocol", directory: str = PRICE_HISTORY_DIR):
+        self.token_id = token_id
+        self.path = os.path.join(directory, token_id)
+        self.client = CoinGeckoToken(token_id)
+        self._lock = threading.Lock()
+        self._synced_at = 0.0
+
+    @property
+    def _block_path(self) -> str:
+        return os.path.join(self.path, "history.npy")
+
+    def load(self) -> Dict[str, np.ndarray]:
+        """Stored columns, memory-mapped read-only from one file so they always line up"""
+        try:
+            block = np.load(self._block_path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            block = None
+        if block is None or block.ndim != 2 or block.shape[0] != len(COLUMNS):
+            block = np.empty((len(COLUMNS), 0))
+        # Each row is one contiguous column; ms timestamps are exact in float64
+        columns = dict(zip(COLUMNS, block))
+        columns["ts"] = columns["ts"].astype(np.int64)
+        return columns
+
+    def _save(self, columns: Dict[str, np.ndarray]):
+        os.makedirs(self.path, exist_ok=True)
+        block = np.vstack([np.asarray(columns[name], dtype=np.float64) for name in COLUMNS])
+        # Write then rename so readers never map a half-written or mixed-version file
+        tmp = self._block_path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, block)
+        os.replace(tmp, self._block_path)
+
+    def _download(self, start: float, end: float) -> Optional[Dict[str, np.ndarray]]:
+        data = self.client.get_price_history_range(start, end)
+        if "error" in data:
+            raise RuntimeError(f"CoinGecko price history failed: {data['error']}")
+        if not data["prices"]:
+            return None
+        prices = np.asarray(data["prices"], dtype=np.float64)
+        ts = prices[:, 0].astype(np.int64)
+        return {
+            "ts": ts,
+            "price": prices[:, 1],
+            "market_cap": _as_column(data["market_caps"], ts),
+            "volume": _as_column(data["total_volumes"], ts)
+        }
+
+    def sync(self, days: float) -> int:
+        """Fetch whatever part of the last `days` is missing locally; returns rows added"""
+        with self._lock:
+            now = time.time()
+            start = now - days * 86400
+            stored = self.load()
+            parts = []
+            if len(stored["ts"]) == 0:
+                parts.append(self._download(start, now))
+            else:
+                first, last = stored["ts"][0] / 1000, stored["ts"][-1] / 1000
+                if start < first - MIN_REFRESH_SECONDS:
+                    parts.append(self._download(start, first))
+                if now - max(last, self._synced_at) > MIN_REFRESH_SECONDS:
+                    parts.append(self._download(last + 1, now))
+            self._synced_at = now
+            parts = [part for part in parts if part is not None]
+            if not parts:
+                return 0
+
+            merged = {name: np.concatenate([np.asarray(stored[name])] + [part[name] for part in parts])
+                      for name in COLUMNS}
+            # Sort by time and drop samples we already had
+            ts, index = np.unique(merged["ts"], return_index=True)
+            columns = {name: merged[name][index] for name in COLUMNS}
+            columns["ts"] = ts
+            self._save(columns)
+            return len(ts) - len(stored["ts"])
+
+    def series(self, days: float, column: str = "price") -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps in ms, values) for the last `days`, synced first"""
+        self.sync(days)
+        with self._lock:
+            stored = self.load()
+        start = int((time.time() - days * 86400) * 1000)
+        offset = int(np.searchsorted(stored["ts"], start))
+        return stored["ts"][offset:], stored[column][offset:]
+
+    def analyze(self, days: float = 30, interval: str = "1d", ma_windows: Sequence[int] = (7, 30)) -> Dict:
+        """Candles plus summary statistics for the last `days`"""
+        if interval not in INTERVALS:
+            raise ValueError(f"Unknown interval '{interval}'. Use: {', '.join(INTERVALS)}")
+        ts, prices = self.series(days)
+        candles = resample_ohlc(ts, np.asarray(prices), INTERVALS[interval])
+        closes = candles["close"]
+        if len(closes) == 0:
+            return {"error": "No price history available"}
+
+        periods_per_year = 365 * 86400 / INTERVALS[interval]
+        averages = {}
+        for window in ma_windows:
+            latest = moving_average(closes, window)[-1]
+            averages[f"sma_{window}"] = None if np.isnan(latest) else float(latest)
+        return {
+            "token_id": self.token_id,
+            "interval": interval,
+            "last_price": float(closes[-1]),
+            "change_pct": float((closes[-1] / candles["open"][0] - 1) * 100),
+            "high": float(candles["high"].max()),
+            "low": float(candles["low"].min()),
+            "volatility_annualized": volatility(closes, periods_per_year),
+            "moving_averages": averages,
+            "candles": [
+                {"ts": int(t), "open": float(o), "high": float(h), "low": float(l), "close": float(c)}
+                for t, o, h, l, c in zip(candles["ts"], candles["open"], candles["high"],
+                                         candles["low"], closes)
+            ]
+        }
+
+_histories: Dict[str, PriceHistory] = {}
+_histories_lock = threading.Lock()
+
+def get_price_history(token_id: str = "push-protocol") -> PriceHistory:
+    """Shared PriceHistory per coin so concurrent syncs serialize on one lock"""
+    with _histories_lock:
+        if token_id not in _histories:
+            _histories[token_id] = PriceHistory(token_id)
+        return _histories[token_id]
@@ -0,0 +1,102 @@
+import re
+import threading
+import unicodedata
+from typing import Callable, Dict, Optional
+from cache import ResponseCache, MISS
+from ratelimit import SingleFlight
+
+# Words that do not change what a short question is asking for
+STOPWORDS = frozenset(
+    "a an the is are was were be do does did can could would should will of on in to for with about "
+    "me my i you your please tell explain what's whats s hey hi hello".split()
+)
+_WORD = re.compile(r"[a-z0-9]+")
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, width and whitespace-insensitive form of a prompt"""
+    text = unicodedata.normalize("NFKC", prompt or "").lower()
+    return " ".join(text.split()).strip(" ?!.")
+
+def near_duplicate_key(prompt: str) -> str:
+    """Content words in their original order, so filler and punctuation changes collide
+
+    Order is kept on purpose: "PC for 1 ETH" and "ETH for 1 PC" are different questions.
+    """
+    words = [word for word in _WORD.findall(normalize_prompt(prompt)) if word not in STOPWORDS]
+    return " ".join(words)
+
+class PromptCache:
+    """LRU + TTL cache of model answers with in-flight deduplication of identical prompts"""
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, ttl: Optional[float] = 3600,
+                 near_duplicates: bool = False):
+        self.ttl = ttl
+        self.near_duplicates = near_duplicates
+        self.requests = 0
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._cache = ResponseCache(max_bytes=max_bytes)
+        self._single_flight = SingleFlight()
+        self._lock = threading.Lock()
+
+    def _count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def lookup(self, prompt: str):
+        """Cached answer for prompt, or MISS"""
+        answer = self._cache.get("exact:" + normalize_prompt(prompt))
+        if answer is not MISS:
+            self._count("hits")
+            return answer
+        if self.near_duplicates:
+            key = near_duplicate_key(prompt)
+            if key:
+                answer = self._cache.get("near:" + key)
+                if answer is not MISS:
+                    self._count("near_hits")
+                    return answer
+        return MISS
+
+    def store(self, prompt: str, answer: str):
+        self._cache.set("exact:" + normalize_prompt(prompt), answer, self.ttl)
+        key = near_duplicate_key(prompt) if self.near_duplicates else ""
+        if key:
+            self._cache.set("near:" + key, answer, self.ttl)
+
+    def get_or_generate(self, prompt: str, generate: Callable[[str], str]) -> str:
+        """Serve from cache, or call generate once even if many threads ask at the same time"""
+        self._count("requests")
+        answer = self.lookup(prompt)
+        if answer is not MISS:
+            return answer
+
+        def load():
+            # A concurrent leader may have finished between our lookup and now
+            cached = self.lookup(prompt)
+            if cached is not MISS:
+                return cached
+            self._count("misses")
+            result = generate(prompt)
+            self.store(prompt, result)
+            return result
+
+        return self._single_flight.do("exact:" + normalize_prompt(prompt), load)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                # Waited on an identical in-flight prompt instead of calling the model
+                "coalesced": self.requests - self.hits - self.near_hits - self.misses,
+                "misses": self.misses,
+                "hit_rate": round(1 - self.misses / self.requests, 4) if self.requests else 0.0,
+                "entries": self._cache.stats()["entries"],
+                "bytes": self._cache.stats()["bytes"]
+            }
@@ -0,0 +1,241 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Union
+from nonce_manager import is_already_known
+
+RawTransaction = Union[str, bytes]
+
+def _normalize(tx_hash) -> str:
+    if isinstance(tx_hash, (bytes, bytearray)):
+        tx_hash = tx_hash.hex()
+    tx_hash = tx_hash.lower()
+    return tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+
+class _Pending:
+    def __init__(self, tx_hash: str, raw_tx: Optional[RawTransaction], block: int):
+        self.tx_hash = tx_hash
+        self.raw_tx = raw_tx
+        self.future: Future = Future()
+        self.callbacks: List[Callable] = []
+        self.tracked_at_block = block
+        self.checked_at_block = block
+
+class ReceiptTracker:
+    """Follows new blocks and resolves every pending transfer from one polling loop"""
+
+    def __init__(self, get_w3: Callable, poll_interval: float = 2.0, drop_after_blocks: int = 50,
+                 resolved_capacity: int = 10000):
+        self._get_w3 = get_w3
+        self.poll_interval = poll_interval
+        self.drop_after_blocks = drop_after_blocks
+        self.block_receipts_supported = True
+        self._pending: Dict[str, _Pending] = {}
+        self._dropped: Dict[str, _Pending] = {}
+        # Recently settled transfers, so late subscribers still get their answer
+        self._resolved: "OrderedDict[str, Dict]" = OrderedDict()
+        self._resolved_capacity = resolved_capacity
+        self._last_block: Optional[int] = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def track(self, tx_hash, raw_tx: Optional[RawTransaction] = None,
+              callback: Optional[Callable[[Dict], None]] = None) -> Future:
+        """Watch a sent transaction; the future and callback receive its final status"""
+        key = _normalize(tx_hash)
+        with self._lock:
+            resolved = self._resolved.get(key)
+            if resolved is None:
+                record = self._pending.get(key) or self._dropped.get(key)
+                if record is None:
+                    record = _Pending(key, raw_tx, self._last_block or 0)
+                    self._pending[key] = record
+                if raw_tx is not None and record.raw_tx is None:
+                    record.raw_tx = raw_tx
+                if callback is not None:
+                    record.callbacks.append(callback)
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="receipt-tracker", daemon=True)
+                    self._thread.start()
+                return record.future
+
+        future: Future = Future()
+        future.set_result(resolved)
+        if callback is not None:
+            self._notify(callback, resolved)
+        return future
+
+    def status(self, tx_hash) -> str:
+        key = _normalize(tx_hash)
+        with self._lock:
+            if key in self._resolved:
+                return self._resolved[key]["status"]
+            if key in self._dropped:
+                return "dropped"
+            return "pending" if key in self._pending else "unknown"
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def dropped(self) -> List[str]:
+        """Hashes the node has forgotten without mining; see rebroadcast()"""
+        with self._lock:
+            return list(self._dropped)
+
+    def rebroadcast(self, tx_hash) -> Future:
+        """Resend a dropped transaction's signed bytes and resume tracking it"""
+        key = _normalize(tx_hash)
+        with self._lock:
+            record = self._dropped.get(key)
+        if record is None:
+            raise KeyError(f"Transaction {key} is not marked as dropped")
+        if record.raw_tx is None:
+            raise ValueError(f"No signed transaction kept for {key}")
+
+        try:
+            self._get_w3().eth.send_raw_transaction(record.raw_tx)
+        except Exception as e:
+            # Already in the mempool is as good as a successful resend
+            if not is_already_known(e):
+                raise
+        with self._lock:
+            self._dropped.pop(key, None)
+            record.future = Future()
+            record.tracked_at_block = record.checked_at_block = self._last_block or 0
+            self._pending[key] = record
+        return record.future
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"❌ Receipt tracker poll failed: {str(e)}")
+            time.sleep(self.poll_interval)
+
+    def poll(self) -> int:
+        """Process blocks since the last poll; returns how many transfers were settled"""
+        w3 = self._get_w3()
+        head = w3.eth.block_number
+        with self._lock:
+            if self._last_block is None:
+                self._last_block = head - 1
+                for record in self._pending.values():
+                    record.tracked_at_block = record.checked_at_block = self._last_block
+            start = self._last_block + 1
+            idle = not self._pending
+
+        if idle:
+            # Nothing in flight, so there is no reason to download blocks
+            with self._lock:
+                self._last_block = max(self._last_block, head)
+            return 0
+
+        settled = 0
+        for number in range(start, head + 1):
+            block = w3.eth.get_block(number)
+            hashes = {_normalize(tx) for tx in block["transactions"]}
+            with self._lock:
+                matched = [key for key in hashes if key in self._pending]
+            if matched:
+                settled += self._settle_block(w3, number, matched)
+            with self._lock:
+                self._last_block = number
+
+        settled += self._check_stale(w3, head)
+        return settled
+
+    def _block_receipts(self, w3, number: int, matched: List[str]) -> Dict[str, Dict]:
+        if self.block_receipts_supported:
+            try:
+                receipts = w3.manager.request_blocking("eth_getBlockReceipts", [hex(number)])
+                return {_normalize(receipt["transactionHash"]): receipt for receipt in receipts}
+            except Exception:
+                self.block_receipts_supported = False
+        return {key: w3.eth.get_transaction_receipt(key) for key in matched}
+
+    def _settle_block(self, w3, number: int, matched: List[str]) -> int:
+        receipts = self._block_receipts(w3, number, matched)
+        for key in matched:
+            receipt = receipts.get(key)
+            if receipt is not None:
+                self._settle_receipt(key, receipt)
+        return len(matched)
+
+    def _settle_receipt(self, key: str, receipt) -> None:
+        status = receipt["status"]
+        if isinstance(status, str):
+            status = int(status, 16)
+        block_number = receipt["blockNumber"]
+        gas_used = receipt["gasUsed"]
+        self._resolve(key, {
+            "tx_hash": key,
+            "status": "confirmed" if status == 1 else "reverted",
+            "block_number": int(block_number, 16) if isinstance(block_number, str) else block_number,
+            "gas_used": int(gas_used, 16) if isinstance(gas_used, str) else gas_used
+        })
+
+    def _check_stale(self, w3, head: int) -> int:
+        """Ask the node about transfers unseen for drop_after_blocks blocks"""
+        with self._lock:
+            stale = [record for record in self._pending.values()
+                     if head - record.checked_at_block >= self.drop_after_blocks]
+        from web3.exceptions import TransactionNotFound
+        settled = 0
+        for record in stale:
+            try:
+                tx = w3.eth.get_transaction(record.tx_hash)
+            except TransactionNotFound:
+                tx = None
+            except Exception:
+                # Timeouts and node errors say nothing about the transfer; ask again next tick
+                continue
+            if tx is not None and tx.get("blockNumber") is not None:
+                # Mined before we started watching for it
+                self._settle_receipt(record.tx_hash, w3.eth.get_transaction_receipt(record.tx_hash))
+                settled += 1
+            elif tx is not None:
+                with self._lock:
+                    record.checked_at_block = head
+            else:
+                self._resolve(record.tx_hash, {"tx_hash": record.tx_hash, "status": "dropped"}, dropped=True)
+                settled += 1
+        return settled
+
+    def _resolve(self, key: str, result: Dict, dropped: bool = False):
+        with self._lock:
+            record = self._pending.pop(key, None)
+            if record is None:
+                return
+            if dropped:
+                # Kept (with its signed bytes) until someone rebroadcasts it
+                self._dropped[key] = record
+            else:
+                self._resolved[key] = result
+                if len(self._resolved) > self._resolved_capacity:
+                    self._resolved.popitem(last=False)
+            callbacks = list(record.callbacks)
+        record.future.set_result(result)
+        for callback in callbacks:
+            self._notify(callback, result)
+
+    @staticmethod
+    def _notify(callback: Callable, result: Dict):
+        try:
+            callback(result)
+        except Exception as e:
+            print(f"❌ Receipt callback failed for {result['tx_hash']}: {str(e)}")
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_receipt_tracker() -> ReceiptTracker:
+    """Shared tracker over the Push Chain RPC"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            import rpc_pool
+            _tracker = ReceiptTracker(lambda: rpc_pool.get_pool().web3)
+    return _tracker
@@ -0,0 +1,290 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence
+import http_client
+import metrics
+
+DEFAULT_RPC_URL = "https://evm.rpc-testnet-donut-node2.push.org/"
+# Comma-separated list; the first entry is preferred until probes say otherwise
+RPC_URLS = [url.strip() for url in os.getenv("PUSH_RPC_URLS", DEFAULT_RPC_URL).split(",") if url.strip()]
+
+PROBE_INTERVAL = float(os.getenv("RPC_PROBE_INTERVAL", "5"))
+MAX_LAG_BLOCKS = int(os.getenv("RPC_MAX_LAG_BLOCKS", "3"))
+# A read still unanswered after this long is also sent to the next-best node
+HEDGE_AFTER = float(os.getenv("RPC_HEDGE_AFTER", "0.5"))
+WRITE_METHODS = frozenset(["eth_sendRawTransaction", "eth_sendTransaction"])
+
+class NoHealthyEndpoint(Exception):
+    pass
+
+class Endpoint:
+    def __init__(self, url: str, hedge_after: Optional[float] = None):
+        from web3 import Web3
+        self.url = url
+        self.provider = Web3.HTTPProvider(
+            url, request_kwargs={"timeout": (http_client.CONNECT_TIMEOUT, http_client.READ_TIMEOUT)}
+        )
+        # Same endpoint with a read timeout of hedge_after, for first attempts that may be hedged
+        self.hedge_provider = Web3.HTTPProvider(
+            url, request_kwargs={"timeout": (http_client.CONNECT_TIMEOUT, hedge_after)}
+        ) if hedge_after else None
+        self.latency: Optional[float] = None  # EWMA seconds
+        self.height: Optional[int] = None
+        self.healthy = True
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def observe(self, seconds: float):
+        self.latency = seconds if self.latency is None else 0.7 * self.latency + 0.3 * seconds
+        self.healthy = True
+        self.failures = 0
+
+    def fail(self, error: Exception):
+        self.failures += 1
+        self.last_error = str(error)
+        self.healthy = False
+
+    def request(self, method: str, params: Any) -> Dict:
+        start = time.perf_counter()
+        try:
+            response = self.provider.make_request(method, params)
+        except Exception as e:
+            self.fail(e)
+            raise
+        self.observe(time.perf_counter() - start)
+        return response
+
+    def request_or_timeout(self, method: str, params: Any) -> Dict:
+        """Like request, but give up after hedge_after; a slow answer is not a health failure"""
+        import requests
+        start = time.perf_counter()
+        try:
+            response = self.hedge_provider.make_request(method, params)
+        except requests.Timeout:
+            raise
+        except Exception as e:
+            self.fail(e)
+            raise
+        self.observe(time.perf_counter() - start)
+        return response
+
+class RPCPool:
+    """Several RPC endpoints behind one interface: health-probed, latency-ranked, hedged and failing over"""
+
+    def __init__(self, urls: Sequence[str], probe_interval: float = PROBE_INTERVAL,
+                 max_lag: int = MAX_LAG_BLOCKS, hedge_after: float = HEDGE_AFTER):
+        if not urls:
+            raise ValueError("RPCPool needs at least one endpoint")
+        self.endpoints = [Endpoint(url, hedge_after) for url in urls]
+        self.probe_interval = probe_interval
+        self.max_lag = max_lag
+        self.hedge_after = hedge_after
+        # Only probes and hedged reads use it; first attempts run on the calling thread
+        self._executor = ThreadPoolExecutor(max_workers=4 * len(self.endpoints), thread_name_prefix="rpc-pool")
+        self._lock = threading.Lock()
+        self._prober = None
+        self._web3 = None
+
+    def _start_prober(self):
+        with self._lock:
+            if self._prober is None and self.probe_interval:
+                self._prober = threading.Thread(target=self._run_prober, name="rpc-probe", daemon=True)
+                self._prober.start()
+
+    def _run_prober(self):
+        while True:
+            self.probe()
+            time.sleep(self.probe_interval)
+
+    def probe(self):
+        """Measure latency and block height of every endpoint concurrently"""
+        def check(endpoint: Endpoint):
+            try:
+                response = endpoint.request("eth_blockNumber", [])
+                endpoint.height = int(response["result"], 16)
+            except Exception:
+                pass
+
+        list(self._executor.map(check, self.endpoints))
+
+    def ranked(self) -> List[Endpoint]:
+        """Healthy in-sync endpoints by latency, then lagging ones, then unhealthy as a last resort"""
+        heights = [e.height for e in self.endpoints if e.healthy and e.height is not None]
+        tip = max(heights) if heights else None
+
+        def rank(endpoint: Endpoint):
+            in_sync = tip is None or (endpoint.height is not None and endpoint.height >= tip - self.max_lag)
+            latency = endpoint.latency if endpoint.latency is not None else 0.0
+            return (not endpoint.healthy, not in_sync, latency)
+
+        return sorted(self.endpoints, key=rank)
+
+    def best_url(self) -> str:
+        self._start_prober()
+        return self.ranked()[0].url
+
+    def read(self, method: str, params: Any) -> Dict:
+        """Send to the best endpoint; hedge to the next one if it is slow, fail over if it errors"""
+        import requests
+        self._start_prober()
+        candidates = self.ranked()
+        if len(candidates) == 1 or not self.hedge_after:
+            return self._read_in_turn(candidates, method, params)
+        
+        # First attempt on the calling thread, bounded by hedge_after
+        try:
+            return candidates[0].request_or_timeout(method, params)
+        except requests.Timeout as e:
+            # Slow leader: ask it again (reads are idempotent) alongside the runner-up
+            last_error: Optional[Exception] = e
+            pending = {metrics.submit_in_context(self._executor, candidate.request, method, params)
+                       for candidate in candidates[:2]}
+        except Exception as e:
+            last_error = e
+            pending = {metrics.submit_in_context(self._executor, candidates[1].request, method, params)}
+        next_index = 2
+        while pending:
+            timeout = self.hedge_after if next_index < len(candidates) else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+            if next_index < len(candidates):
+                # Either everything in flight is slow (hedge) or it failed (failover)
+                pending.add(metrics.submit_in_context(self._executor, candidates[next_index].request, method, params))
+                next_index += 1
+        raise NoHealthyEndpoint(f"All RPC endpoints failed for {method}: {last_error}")
+
+    def _read_in_turn(self, candidates: List[Endpoint], method: str, params: Any) -> Dict:
+        last_error: Optional[Exception] = None
+        for endpoint in candidates:
+            try:
+                return endpoint.request(method, params)
+            except Exception as e:
+                last_error = e
+        raise NoHealthyEndpoint(f"All RPC endpoints failed for {method}: {last_error}")
+
+    def write(self, method: str, params: Any) -> Dict:
+        """Send a transaction to one endpoint at a time, moving on only on transport errors"""
+        self._start_prober()
+        last_error: Optional[Exception] = None
+        for index, endpoint in enumerate(self.ranked()):
+            try:
+                response = endpoint.request(method, params)
+            except Exception as e:
+                last_error = e
+                continue
+            error = response.get("error") if isinstance(response, dict) else None
+            if index and error and "already known" in str(error).lower() and method == "eth_sendRawTransaction":
+                # A node we timed out on did receive it; the hash is the same everywhere
+                from nonce_manager import transaction_hash
+                raw = params[0] if isinstance(params[0], str) else bytes(params[0])
+                return {"jsonrpc": "2.0", "id": response.get("id"), "result": transaction_hash(raw).hex()}
+            return response
+        raise NoHealthyEndpoint(f"All RPC endpoints failed for {method}: {last_error}")
+
+    def request(self, method: str, params: Any) -> Dict:
+        if method in WRITE_METHODS:
+            return self.write(method, params)
+        return self.read(method, params)
+
+    def post(self, payload: Any, timeout=None, prefer: Optional[str] = None):
+        """POST a raw JSON-RPC body (e.g. a batch), failing over on connection errors"""
+        import requests
+        self._start_prober()
+        endpoints = self.ranked()
+        if prefer:
+            endpoints.sort(key=lambda e: e.url != prefer)
+        last_error: Optional[Exception] = None
+        for endpoint in endpoints:
+            start = time.perf_counter()
+            try:
+                response = http_client.post(endpoint.url, json=payload, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                endpoint.fail(e)
+                last_error = e
+                continue
+            endpoint.observe(time.perf_counter() - start)
+            return response
+        raise NoHealthyEndpoint(f"All RPC endpoints failed: {last_error}")
+
+    async def async_post(self, payload: Any) -> "http_client.AsyncResponse":
+        """Async counterpart of post(): ranked endpoints in turn, failing over on connection errors"""
+        import aiohttp
+        self._start_prober()
+        last_error: Optional[Exception] = None
+        for endpoint in self.ranked():
+            start = time.perf_counter()
+            try:
+                response = await http_client.get_async_client().post(endpoint.url, json=payload)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                endpoint.fail(e)
+                last_error = e
+                continue
+            endpoint.observe(time.perf_counter() - start)
+            return response
+        raise NoHealthyEndpoint(f"All RPC endpoints failed: {last_error}")
+
+    def status(self) -> List[Dict]:
+        return [
+            {"url": e.url, "healthy": e.healthy, "height": e.height, "failures": e.failures,
+             "latency_ms": round(e.latency * 1000, 2) if e.latency is not None else None,
+             "last_error": e.last_error}
+            for e in self.ranked()
+        ]
+
+    @property
+    def web3(self):
+        """Web3 client whose every request is routed through this pool"""
+        with self._lock:
+            if self._web3 is None:
+                from web3 import Web3
+                self._web3 = metrics.instrument_web3(Web3(_pool_provider(self)))
+            return self._web3
+
+_provider_class = None
+
+def _pool_provider(pool: RPCPool):
+    """web3 provider that delegates to an RPCPool (class built on first use to keep web3 out of import time)"""
+    global _provider_class
+    if _provider_class is None:
+        from web3.providers.base import JSONBaseProvider
+
+        class PoolProvider(JSONBaseProvider):
+            def __init__(self, pool: RPCPool):
+                super().__init__()
+                self.pool = pool
+
+            def make_request(self, method, params):
+                return self.pool.request(method, params)
+
+            def is_connected(self, show_traceback: bool = False) -> bool:
+                return any(endpoint.healthy for endpoint in self.pool.endpoints)
+
+        _provider_class = PoolProvider
+    return _provider_class(pool)
+
+_pools: Dict[tuple, RPCPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(urls: Optional[Sequence[str]] = None) -> RPCPool:
+    """Shared pool for a set of endpoints (PUSH_RPC_URLS by default)"""
+    key = tuple(urls or RPC_URLS)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = RPCPool(key)
+        return pool
+
+def get_pool_for(url: str) -> RPCPool:
+    """Pool containing url, or a single-endpoint pool for it"""
+    with _pools_lock:
+        for key, pool in _pools.items():
+            if url in key:
+                return pool
+    return get_pool([url])
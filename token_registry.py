@@ -0,0 +1,107 @@
+import bisect
+import difflib
+import json
+import os
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional
+
+DEFAULT_TOKENS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tokensList.json")
+
+def normalize_symbol(symbol: str) -> str:
+    """Canonical form for symbol lookups: NFKC, no invisible format characters, upper case"""
+    normalized = unicodedata.normalize("NFKC", symbol or "")
+    return "".join(ch for ch in normalized if unicodedata.category(ch) != "Cf").strip().upper()
+
+def _holders(token: Dict) -> int:
+    try:
+        return int(token.get("holders") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+class _Snapshot:
+    """Immutable set of indexes built from one version of the token list"""
+
+    def __init__(self, tokens: List[Dict], mtime: float):
+        self.mtime = mtime
+        self.by_symbol: Dict[str, List[Dict]] = {}
+        self.by_address: Dict[str, Dict] = {}
+        for token in tokens:
+            self.by_symbol.setdefault(normalize_symbol(token.get("symbol", "")), []).append(token)
+            if token.get("address"):
+                self.by_address[token["address"].lower()] = token
+        # Duplicate symbols: the most widely held token wins
+        for matches in self.by_symbol.values():
+            matches.sort(key=_holders, reverse=True)
+        self.symbols = sorted(self.by_symbol)
+
+class TokenRegistry:
+    """Indexed lookups over tokensList.json with hot reload"""
+
+    def __init__(self, path: str = DEFAULT_TOKENS_PATH, check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._checked_at = 0.0
+        self._reload_lock = threading.Lock()
+        self._snapshot = _Snapshot([], 0.0)
+        self.reload()
+
+    def reload(self) -> bool:
+        """Rebuild the indexes if the file changed and swap them in atomically"""
+        with self._reload_lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return False
+            if mtime == self._snapshot.mtime:
+                return False
+            try:
+                with open(self.path, "r") as f:
+                    tokens = json.load(f).get("items", [])
+            except (OSError, ValueError):
+                # Caught mid-write: keep serving the current snapshot and retry on the next check
+                return False
+            self._snapshot = _Snapshot(tokens, mtime)
+            return True
+
+    def _current(self) -> _Snapshot:
+        if self.check_interval is not None and time.monotonic() - self._checked_at > self.check_interval:
+            self.reload()
+        return self._snapshot
+
+    def __len__(self) -> int:
+        return len(self._current().by_address)
+
+    def find_by_symbol(self, symbol: str) -> Optional[Dict]:
+        matches = self._current().by_symbol.get(normalize_symbol(symbol))
+        return matches[0] if matches else None
+
+    def find_all_by_symbol(self, symbol: str) -> List[Dict]:
+        return list(self._current().by_symbol.get(normalize_symbol(symbol), []))
+
+    def list_tokens(self, token_type: Optional[str] = None) -> List[Dict]:
+        """Every listed token with an address, optionally of one type (e.g. "ERC-20")"""
+        tokens = self._current().by_address.values()
+        return [token for token in tokens if token_type is None or token.get("type") == token_type]
+
+    def find_by_address(self, address: str) -> Optional[Dict]:
+        return self._current().by_address.get((address or "").lower())
+
+    def starts_with(self, prefix: str, limit: int = 10) -> List[Dict]:
+        snapshot = self._current()
+        prefix = normalize_symbol(prefix)
+        start = bisect.bisect_left(snapshot.symbols, prefix)
+        results = []
+        for symbol in snapshot.symbols[start:]:
+            if not symbol.startswith(prefix) or len(results) >= limit:
+                break
+            results.append(snapshot.by_symbol[symbol][0])
+        return results
+
+    def fuzzy(self, symbol: str, limit: int = 5, cutoff: float = 0.6) -> List[Dict]:
+        """Closest symbols for a near miss (linear, so only used after an exact lookup fails)"""
+        snapshot = self._current()
+        close = difflib.get_close_matches(normalize_symbol(symbol), snapshot.symbols, n=limit, cutoff=cutoff)
+        return [snapshot.by_symbol[match][0] for match in close]